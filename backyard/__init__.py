@@ -0,0 +1 @@
+"""Helpers behind the Backyard Friends critter game in elizabeth-gift.py."""
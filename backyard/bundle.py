@@ -0,0 +1,39 @@
+"""Reading and writing pre-generated question bundles.
+
+A bundle is compact JSON, gzipped when the file name ends in `.gz`:
+{"version": 1, "generated_at": <unix time>, "pairs": {"animal|context": [question, ...]}}
+"""
+import gzip
+import json
+import time
+
+BUNDLE_VERSION = 1
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_bundle(path, questions):
+    """Write questions (dicts carrying "animal" and "context") grouped by pair."""
+    pairs = {}
+    for question_data in questions:
+        item = {k: v for k, v in question_data.items() if k not in ("animal", "context")}
+        pairs.setdefault(f"{question_data['animal']}|{question_data['context']}", []).append(item)
+    with _open(path, "w") as f:
+        json.dump({"version": BUNDLE_VERSION, "generated_at": time.time(), "pairs": pairs}, f, separators=(",", ":"))
+    return sum(len(items) for items in pairs.values())
+
+
+def read_bundle(path):
+    """Yield every question in a bundle with its "animal" and "context" filled in."""
+    with _open(path, "r") as f:
+        bundle = json.load(f)
+    if bundle.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported question bundle version: {bundle.get('version')}")
+    for pair, items in bundle["pairs"].items():
+        animal, context = pair.split("|", 1)
+        for item in items:
+            yield dict(item, animal=animal, context=context)
@@ -0,0 +1,133 @@
+"""Deterministic stand-in for the Gemini model, for offline runs and load tests.
+
+FakeModel answers the same prompts as `genai.GenerativeModel` with made-up
+but well-formed questions, and can inject latency, errors and malformed
+output so the rest of the pipeline can be exercised without a network.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+
+SINGLE_TOPIC = re.compile(r"Generate a question about a (.+?)'s (.+?)\.")
+BATCH_TOPIC = re.compile(r"^\s*\d+\. a (.+?)'s (.+?)$", re.MULTILINE)
+
+
+class FakeResponse:
+    """Just enough of a Gemini response for our callers."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeBackendError(Exception):
+    """An injected failure that looks like an HTTP error from the provider."""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def fake_question(animal, context, n=0):
+    options = [
+        f"A well-known fact about the {animal}'s {context}",
+        f"Something a {animal} never does",
+        f"A myth about the {animal}",
+    ]
+    return {
+        "question": f"Which of these is true about a {animal}'s {context}? (#{n})",
+        "options": options,
+        "correct_answer": options[0],
+        "additional_fact": f"Fake fact #{n} about the {animal}.",
+    }
+
+
+def _malform(text, rng):
+    """Damage output the way real models sometimes do."""
+    choice = rng.randrange(4)
+    if choice == 0:
+        return "Sure! Here is your question:\n" + text
+    if choice == 1:
+        return text[: len(text) // 2]
+    if choice == 2:
+        return text.replace("]", ",]", 1)
+    return text.replace('"', "“", 2)
+
+
+class FakeModel:
+    """Drop-in for `genai.GenerativeModel` that never touches the network."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, malformed_rate=0.0, seed=None, model_name="fake",
+                 tail_latency=0.0, tail_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.model_name = model_name
+        # A `tail_rate` share of calls take `tail_latency` seconds instead
+        self.tail_latency = tail_latency
+        self.tail_rate = tail_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        """Decide up front how this call will behave: (n, delay, error code or None, malformed)."""
+        with self._lock:
+            self.calls += 1
+            delay = self.tail_latency if self._rng.random() < self.tail_rate else self.latency
+            error_code = self._rng.choice([429, 503]) if self._rng.random() < self.error_rate else None
+            return self.calls, delay, error_code, self._rng.random() < self.malformed_rate
+
+    def _respond(self, prompt, n, error_code, malform):
+        if error_code:
+            raise FakeBackendError(error_code, "injected failure")
+
+        topics = BATCH_TOPIC.findall(prompt)
+        if topics:
+            text = json.dumps([fake_question(a, c, f"{n}.{i}") for i, (a, c) in enumerate(topics)], indent=2)
+        else:
+            match = SINGLE_TOPIC.search(prompt)
+            animal, context = match.groups() if match else ("squirrel", "behavior")
+            text = json.dumps(fake_question(animal, context, n), indent=2)
+        text = f"```json\n{text}\n```"
+        if malform:
+            with self._lock:
+                text = _malform(text, self._rng)
+        return text
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        n, delay, error_code, malform = self._roll()
+        if not stream:
+            if delay:
+                time.sleep(delay)
+            return FakeResponse(self._respond(prompt, n, error_code, malform))
+        text = self._respond(prompt, n, error_code, malform)
+        return self._sync_chunks(text, delay)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        n, delay, error_code, malform = self._roll()
+        if not stream:
+            if delay:
+                await asyncio.sleep(delay)
+            return FakeResponse(self._respond(prompt, n, error_code, malform))
+        text = self._respond(prompt, n, error_code, malform)
+        return self._async_chunks(text, delay)
+
+    def _sync_chunks(self, text, delay):
+        # The total latency is spread evenly over the chunks
+        pieces = _split(text)
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield FakeResponse(piece)
+
+    async def _async_chunks(self, text, delay):
+        pieces = _split(text)
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield FakeResponse(piece)
+
+
+def _split(text, size=32):
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
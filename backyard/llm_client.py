@@ -0,0 +1,295 @@
+"""Process-wide LLM client with concurrency limits, deadlines, retries and hedging.
+
+All clients share one asyncio event loop running on a daemon thread, so a
+single underlying model (and its connection pool) is reused by every
+session. Blocking callers use `generate_content`, which mirrors
+`genai.GenerativeModel.generate_content` closely enough to be passed
+anywhere a model is expected; async callers await `agenerate`. `stream`
+yields text chunks as they arrive.
+"""
+import asyncio
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backyard import metrics
+from backyard.response_cache import cache_key
+
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_NAMES = {"ResourceExhausted", "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "TimeoutError"}
+# Threads for blocking model calls (sync SDKs, HTTP backends). asyncio's
+# default is cpu_count + 4, which on a small host is below max_concurrency.
+BLOCKING_CALL_THREADS = 32
+
+_loop = None
+_loop_lock = threading.Lock()
+# Backend name -> semaphore on the shared loop, so a rebuilt client still
+# counts the calls its predecessor has in flight
+_limits = {}
+
+
+def shared_loop():
+    """Return the event loop shared by every client, starting it on first use."""
+    global _loop, _limits
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _limits = {}
+            _loop.set_default_executor(
+                ThreadPoolExecutor(max_workers=BLOCKING_CALL_THREADS, thread_name_prefix="llm-blocking-call")
+            )
+            threading.Thread(target=_loop.run_forever, name="llm-client-loop", daemon=True).start()
+        return _loop
+
+
+def is_retryable(error):
+    """True for rate limits, transient server errors and timeouts."""
+    code = getattr(error, "code", None)
+    if not callable(code) and code in RETRYABLE_CODES:
+        return True
+    return isinstance(error, asyncio.TimeoutError) or type(error).__name__ in RETRYABLE_NAMES
+
+
+class LLMResponse:
+    """The part of a Gemini response our callers read."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ModelBackend:
+    """Adapts a Gemini-style model object to the client.
+
+    Uses the model's `generate_content_async` when it has one and otherwise
+    runs `generate_content` on a worker thread.
+    """
+
+    def __init__(self, model, name=None):
+        self.model = model
+        self.name = name or getattr(model, "model_name", type(model).__name__)
+
+    async def generate(self, prompt):
+        if hasattr(self.model, "generate_content_async"):
+            response = await self.model.generate_content_async(prompt)
+        else:
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+    async def stream(self, prompt):
+        """Yield text chunks; models without async streaming yield the whole text once."""
+        if not hasattr(self.model, "generate_content_async"):
+            yield await self.generate(prompt)
+            return
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+_END_OF_STREAM = object()
+
+
+class LLMClient:
+    """Shared front door to a model backend.
+
+    - at most `max_concurrency` calls per backend are in flight across the
+      process, however many times the client is rebuilt
+    - each attempt is cut off after `timeout` seconds
+    - 429/5xx errors and timeouts are retried with jittered exponential backoff
+    - with `hedge_after`, a second copy of a slow call is started and the
+      first answer wins
+    """
+
+    def __init__(self, backend, max_concurrency=8, timeout=30.0, max_retries=3,
+                 base_delay=0.5, max_delay=8.0, hedge_after=None, unhealthy_after=5, cache=None):
+        self.backend = backend
+        self.model_name = backend.name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.unhealthy_after = unhealthy_after
+        self.consecutive_failures = 0
+        # When the latest call failed and when one last succeeded, for failing()
+        self._failed_at = 0.0
+        self._succeeded_at = 0.0
+        # Optional ResponseCache shared by identical prompts
+        self.cache = cache
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "timeouts": 0, "failures": 0}
+        self._loop = shared_loop()
+
+    def _limit(self):
+        # Only ever called on the loop's thread, so no lock is needed
+        semaphore = _limits.get(self.model_name)
+        if semaphore is None:
+            semaphore = _limits[self.model_name] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _attempt(self, prompt):
+        """One call, hedged with a second copy if it is slow to come back.
+
+        Copies still running when it ends, including when the per-attempt
+        timeout cancels it, are cancelled so they don't outlive their slot.
+        """
+        primary = asyncio.ensure_future(self.backend.generate(prompt))
+        tasks = {primary}
+        try:
+            if self.hedge_after is None:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                return primary.result()
+            self._count("hedges")
+            tasks.add(asyncio.ensure_future(self.backend.generate(prompt)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both copies failed; surface the primary's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def agenerate(self, prompt, deadline=None):
+        """Generate text for `prompt`, retrying transient failures until `deadline` (seconds).
+
+        With a cache, identical prompts share a recent answer or a call
+        that is already running.
+        """
+        if self.cache is None:
+            return await self._generate(prompt, deadline)
+        return await self.cache.get_or_call(
+            cache_key(self.model_name, prompt), lambda: self._generate(prompt, deadline)
+        )
+
+    async def _generate(self, prompt, deadline):
+        with metrics.registry.timer("llm_call_seconds", model=self.model_name):
+            return await self._generate_with_retries(prompt, deadline)
+
+    def _succeeded(self):
+        self.consecutive_failures = 0
+        self._succeeded_at = time.monotonic()
+
+    def _failed(self, error):
+        self._failed_at = time.monotonic()
+        # Rate limits and outages pass on their own; a new client wouldn't help
+        if not is_retryable(error):
+            self.consecutive_failures += 1
+
+    def _count(self, stat):
+        self.stats[stat] += 1
+        metrics.registry.inc(f"llm_{stat}_total", model=self.model_name)
+
+    async def _generate_with_retries(self, prompt, deadline):
+        give_up_at = time.monotonic() + deadline if deadline else None
+        self._count("calls")
+        async with self._limit():
+            for attempt in range(self.max_retries + 1):
+                timeout = self.timeout
+                if give_up_at is not None:
+                    timeout = min(timeout, give_up_at - time.monotonic())
+                try:
+                    text = await asyncio.wait_for(self._attempt(prompt), timeout)
+                    self._succeeded()
+                    return text
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self._count("timeouts")
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    out_of_time = give_up_at is not None and time.monotonic() + delay >= give_up_at
+                    if attempt == self.max_retries or not is_retryable(e) or out_of_time:
+                        self._count("failures")
+                        self._failed(e)
+                        raise
+                    self._count("retries")
+                    await asyncio.sleep(delay)
+
+    async def _pump(self, prompt, chunks):
+        """Stream into a thread-safe queue, retrying only if nothing has been sent yet."""
+        with metrics.registry.timer("llm_stream_seconds", model=self.model_name):
+            await self._pump_with_retries(prompt, chunks)
+
+    async def _pump_with_retries(self, prompt, chunks):
+        self._count("calls")
+        async with self._limit():
+            for attempt in range(self.max_retries + 1):
+                sent = False
+                try:
+                    if not hasattr(self.backend, "stream"):
+                        chunks.put(await asyncio.wait_for(self.backend.generate(prompt), self.timeout))
+                    else:
+                        stream = self.backend.stream(prompt)
+                        while True:
+                            try:
+                                chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                            except StopAsyncIteration:
+                                break
+                            chunks.put(chunk)
+                            sent = True
+                    self._succeeded()
+                    chunks.put(_END_OF_STREAM)
+                    return
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self._count("timeouts")
+                    if sent or attempt == self.max_retries or not is_retryable(e):
+                        self._count("failures")
+                        self._failed(e)
+                        chunks.put(e)
+                        return
+                    self._count("retries")
+                    await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def stream(self, prompt, first_chunk_within=None):
+        """Blocking iterator over text chunks as the model produces them.
+
+        Each chunk must arrive within `timeout` seconds. With
+        `first_chunk_within`, the call is given up, retries and all, if
+        nothing has arrived by then. Stopping early cancels the underlying call.
+        """
+        chunks = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._pump(prompt, chunks), self._loop)
+        wait = first_chunk_within
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=wait)
+                except queue.Empty:
+                    error = TimeoutError(f"{self.model_name} sent nothing in {first_chunk_within}s")
+                    self._failed(error)
+                    raise error from None
+                wait = None
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def forget(self, prompt):
+        """Drop a cached response for `prompt`, e.g. because it did not parse."""
+        if self.cache is not None:
+            key = cache_key(self.model_name, prompt)
+            self._loop.call_soon_threadsafe(self.cache.invalidate, key)
+
+    def failing(self, within=30.0):
+        """True if the latest call to finish failed, less than `within` seconds ago."""
+        return self._failed_at > self._succeeded_at and time.monotonic() - self._failed_at < within
+
+    def healthy(self):
+        """False once the loop has died or calls keep failing for non-retryable reasons
+        (a bad key, a missing model), so the owner can rebuild the client."""
+        return self._loop.is_running() and self.consecutive_failures < self.unhealthy_after
+
+    def generate_content(self, prompt, deadline=None):
+        """Blocking call for script and worker threads; returns an object with `.text`."""
+        future = asyncio.run_coroutine_threadsafe(self.agenerate(prompt, deadline), self._loop)
+        return LLMResponse(future.result())
@@ -0,0 +1,229 @@
+"""In-process metrics: latency histograms, counters and gauges.
+
+One registry per process, off by default. While it is off, `timer()`
+hands back a shared no-op context manager and `inc()`/`observe()` return
+straight away, so instrumented hot paths cost next to nothing.
+
+Metrics can be read in Prometheus text format (`render_prometheus`,
+optionally served over HTTP by `start_http_exporter`) or appended to a
+JSONL file every few seconds by `start_jsonl_dump`.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, Prometheus style."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound below which a `q` share of observations fall."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """Thread-safe store of every metric series in the process."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, label_key) -> Histogram
+        self._counters = {}  # (name, label_key) -> float
+        self._collectors = {}  # name -> callable returning {metric name: value} gauges
+
+    def timer(self, name, **labels):
+        """Context manager that records how long its block took, in seconds."""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, name, labels)
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_collector(self, name, collect):
+        """Register (or replace) a callable returning {metric: value} gauges, read at export time only."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _gauges(self):
+        gauges = {}
+        with self._lock:
+            collectors = list(self._collectors.values())
+        for collect in collectors:
+            try:
+                for name, value in collect().items():
+                    gauges[(name, ())] = value
+            except Exception:
+                continue
+        return gauges
+
+    def snapshot(self):
+        """Every series as plain data, for JSONL dumps and load-test reports."""
+        with self._lock:
+            histograms = {key: (h.count, h.total, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                          for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        return {
+            "time": time.time(),
+            "histograms": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": total, "p50": p50, "p95": p95, "p99": p99}
+                for (name, labels), (count, total, p50, p95, p99) in histograms.items()
+            ],
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in counters.items()],
+            "gauges": [{"name": name, "value": value} for (name, _), value in self._gauges().items()],
+        }
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            typed = set()
+            for (name, labels), histogram in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            for (name, labels), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, _), value in sorted(self._gauges().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+registry = Registry()
+
+
+def start_http_exporter(port, host="127.0.0.1"):
+    """Serve /metrics in Prometheus format from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
+
+
+def start_jsonl_dump(path, interval=60.0):
+    """Append a snapshot to `path` every `interval` seconds from a daemon thread."""
+
+    def dump():
+        while True:
+            time.sleep(interval)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registry.snapshot()) + "\n")
+
+    thread = threading.Thread(target=dump, name="metrics-jsonl", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,206 @@
+"""Tolerant parsing and repair of question JSON from the model.
+
+Models wrap JSON in prose and code fences, leave trailing commas, curl
+their quotes, letter their options or restate the answer slightly
+differently. Re-asking the model costs a full round-trip, so these
+helpers try cheap local fixes first:
+
+- `loads_tolerant` finds the JSON in noisy text and fixes common syntax slips
+- `iter_objects` salvages the complete objects from a truncated array
+- `repair_question` normalizes keys, options and the answer
+- `check_question` enforces the schema the game screen relies on
+"""
+import json
+import re
+
+REQUIRED_KEYS = ("question", "options", "correct_answer", "additional_fact")
+OPTION_COUNT = 3
+
+KEY_ALIASES = {
+    "answer": "correct_answer",
+    "correct": "correct_answer",
+    "correctanswer": "correct_answer",
+    "choices": "options",
+    "fact": "additional_fact",
+    "fun_fact": "additional_fact",
+    "additionalfact": "additional_fact",
+}
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'"})
+_OPTION_PREFIX = re.compile(r"^\s*(?:[A-Da-d]|[1-4])[).:]\s+")
+# How many candidate JSON regions to try before giving up
+_MAX_REGIONS = 3
+
+
+class ResponseParseError(ValueError):
+    """The model output could not be turned into a usable question."""
+
+
+def _balanced_end(text, start):
+    """Index just past the bracket matching text[start], or -1 if it never closes."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def _regions(text, openers="{["):
+    """Yield top-level balanced JSON-looking regions, left to right."""
+    found = 0
+    pos = 0
+    while found < _MAX_REGIONS:
+        starts = [i for i in (text.find(opener, pos) for opener in openers) if i != -1]
+        if not starts:
+            return
+        start = min(starts)
+        end = _balanced_end(text, start)
+        if end == -1:
+            return
+        yield text[start:end]
+        found += 1
+        pos = end
+
+
+def _attempts(text):
+    """Candidate strings to hand to json.loads, cheapest first."""
+    yield text
+    regions = list(_regions(text))
+    yield from regions
+    for candidate in regions or [text]:
+        yield _TRAILING_COMMA.sub(r"\1", candidate)
+    # Curly quotes can hide where strings start, so look for regions again
+    fixed = _TRAILING_COMMA.sub(r"\1", text.translate(_SMART_QUOTES))
+    yield from _regions(fixed)
+
+
+def loads_tolerant(text):
+    """Parse the first JSON value in `text`, fixing what can be fixed locally."""
+    text = (text or "").strip()
+    if not text:
+        raise ResponseParseError("LLM returned an empty response.")
+    for candidate in _attempts(text):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    raise ResponseParseError(f"No parsable JSON in LLM output: {text[:200]}")
+
+
+def iter_objects(text):
+    """Yield every complete top-level object in `text`, even if the array around them was cut off."""
+    text = (text or "").translate(_SMART_QUOTES)
+    pos = text.find("[")
+    pos = pos + 1 if pos != -1 else 0
+    while True:
+        start = text.find("{", pos)
+        if start == -1:
+            return
+        end = _balanced_end(text, start)
+        if end == -1:
+            return
+        try:
+            yield json.loads(_TRAILING_COMMA.sub(r"\1", text[start:end]))
+        except json.JSONDecodeError:
+            yield None
+        pos = end
+
+
+def load_items(text):
+    """Parse a batch response into a list of items; a failed item is None."""
+    try:
+        items = loads_tolerant(text)
+    except ResponseParseError:
+        return list(iter_objects(text))
+    if isinstance(items, dict):
+        return [items]
+    if isinstance(items, list):
+        return items
+    return []
+
+
+def _normalize(text):
+    return " ".join(str(text).lower().split()).rstrip(".")
+
+
+def repair_question(question_data):
+    """Return a cleaned-up copy of a parsed question; never asks the model again."""
+    if not isinstance(question_data, dict):
+        raise ResponseParseError(f"Expected a JSON object, got {type(question_data).__name__}")
+    data = {}
+    for key, value in question_data.items():
+        key = str(key).strip().lower().replace(" ", "_")
+        data[KEY_ALIASES.get(key, key)] = value.strip() if isinstance(value, str) else value
+
+    options = data.get("options")
+    if isinstance(options, dict):
+        options = list(options.values())
+    if not isinstance(options, list):
+        return data
+    options = [str(option).strip() for option in options if str(option).strip()]
+    prefixed = bool(options) and all(_OPTION_PREFIX.match(option) for option in options)
+    if prefixed:
+        options = [_OPTION_PREFIX.sub("", option) for option in options]
+
+    correct = data.get("correct_answer")
+    if isinstance(correct, int) and not isinstance(correct, bool) and 0 <= correct < len(options):
+        correct = options[correct]
+    elif isinstance(correct, str):
+        if len(correct) == 1 and correct.upper() in "ABCD" and "ABCD".index(correct.upper()) < len(options):
+            correct = options["ABCD".index(correct.upper())]
+        elif prefixed or correct not in options:
+            correct = _OPTION_PREFIX.sub("", correct)
+        by_normalized = {_normalize(option): option for option in options}
+        correct = by_normalized.get(_normalize(correct), correct)
+
+    # Too many options: keep the answer and the first distractors, in order
+    if len(options) > OPTION_COUNT and correct in options:
+        keep = {correct}
+        keep.update([option for option in options if option != correct][:OPTION_COUNT - 1])
+        options = [option for option in options if option in keep]
+
+    data["options"] = options
+    data["correct_answer"] = correct
+    return data
+
+
+def check_question(question_data):
+    """Raise ResponseParseError unless the question matches the game's schema."""
+    if not isinstance(question_data, dict):
+        raise ResponseParseError(f"Expected a JSON object, got {type(question_data).__name__}")
+    missing = [key for key in REQUIRED_KEYS if not question_data.get(key)]
+    if missing:
+        raise ResponseParseError(f"Question is missing {', '.join(missing)}")
+    options = question_data["options"]
+    if not isinstance(options, list) or len(options) != OPTION_COUNT:
+        raise ResponseParseError(f"Question must have exactly {OPTION_COUNT} options")
+    if not all(isinstance(option, str) and option for option in options) or len(set(options)) != len(options):
+        raise ResponseParseError("Question options must be distinct, non-empty strings")
+    if question_data["correct_answer"] not in options:
+        raise ResponseParseError("Correct answer is not one of the options")
+    for key in ("question", "additional_fact"):
+        if not isinstance(question_data[key], str):
+            raise ResponseParseError(f"Question {key} must be text")
+    return question_data
+
+
+def parse_question_text(text):
+    """Parse, repair and check a single-question response in one go."""
+    return check_question(repair_question(loads_tolerant(text)))
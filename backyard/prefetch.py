@@ -0,0 +1,100 @@
+"""Background prefetching of critter questions for a single session."""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QuestionPrefetcher:
+    """Keeps the next few questions generating on worker threads.
+
+    `fetch(count)` returns a list of up to `count` question dicts (or
+    raises), so a whole round can come back from one batched LLM call.
+    Failed prefetches are dropped quietly; the caller falls back to its own
+    blocking path, which is where errors get shown to the player.
+
+    Pass a shared `executor` to run on it instead of starting threads of
+    its own; it is left running when the prefetcher is cancelled.
+    """
+
+    def __init__(self, fetch, max_workers=2, executor=None):
+        self._fetch = fetch
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="question-prefetch")
+        self._executor = executor
+        self._ready = deque()
+        # (future, number of questions it was asked for)
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def __len__(self):
+        """Questions that are ready or in flight."""
+        with self._lock:
+            return len(self._ready) + sum(count for _, count in self._pending)
+
+    def fill(self, count):
+        """Make sure `count` questions are ready or in flight."""
+        with self._lock:
+            if self._cancelled:
+                return
+            missing = count - len(self._ready) - sum(n for _, n in self._pending)
+            if missing > 0:
+                self._pending.append((self._executor.submit(self._fetch, missing), missing))
+
+    def _next_future(self):
+        with self._lock:
+            if not self._pending:
+                return None
+            # Prefer a batch that has already finished over the oldest one
+            for entry in self._pending:
+                if entry[0].done():
+                    self._pending.remove(entry)
+                    return entry
+            return self._pending.popleft()
+
+    def pop(self, timeout=None):
+        """Return the next prefetched question, or None once the queue is empty.
+
+        Waits on a request that is already in flight rather than starting a
+        new one, since that is always at least as fast. With `timeout`, also
+        None if that request hasn't finished in time; it stays queued.
+        """
+        while True:
+            with self._lock:
+                if self._ready:
+                    return self._ready.popleft()
+            entry = self._next_future()
+            if entry is None:
+                return None
+            future = entry[0]
+            try:
+                questions = future.result(timeout=timeout)
+            except TimeoutError:
+                if not future.done():
+                    # Still running: leave it at the front for the next pop
+                    with self._lock:
+                        if not self._cancelled:
+                            self._pending.appendleft(entry)
+                    return None
+                # The fetch itself timed out, or finished just as we gave up
+                if future.cancelled() or future.exception() is not None:
+                    continue
+                questions = future.result()
+            except Exception:
+                # Cancelled, timed out or failed; move on to the next one
+                continue
+            with self._lock:
+                if not self._cancelled:
+                    self._ready.extend(q for q in questions if q)
+
+    def cancel(self):
+        """Drop everything queued and stop our own workers. Safe to call twice."""
+        with self._lock:
+            self._cancelled = True
+            for future, _ in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._ready.clear()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,115 @@
+"""Model backends for HTTP model servers.
+
+They have the same shape as llm_client.ModelBackend: an async
+`generate(prompt)` that returns text, an async generator `stream(prompt)`
+and a `name`, so LLMClient and ModelRouter take them as they are.
+Requests go through urllib on worker threads; no HTTP library is needed.
+
+- OpenAIBackend: any OpenAI-compatible `/chat/completions` endpoint,
+  which includes llama.cpp's server, vLLM and LM Studio
+- OllamaBackend: Ollama's `/api/generate`
+"""
+import asyncio
+import json
+import urllib.error
+import urllib.request
+
+_DONE = object()
+
+
+class ProviderError(Exception):
+    """A model server failed a request; `code` is its HTTP status, 503 if it couldn't be reached."""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _HTTPBackend:
+    """Shared request and streaming plumbing; subclasses say what to send and how to read it."""
+
+    path = ""
+
+    def __init__(self, url, model, timeout=60.0, api_key=None, name=None):
+        self.url = url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.api_key = api_key
+        self.name = name or f"{type(self).__name__.removesuffix('Backend').lower()}:{model}"
+
+    def _open(self, prompt, stream):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            self.url + self.path, data=json.dumps(self._payload(prompt, stream)).encode(), headers=headers
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise ProviderError(e.code, e.read().decode(errors="replace")[:200]) from None
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, TimeoutError):
+                raise TimeoutError(f"{self.name} timed out") from None
+            raise ProviderError(503, str(e.reason)) from None
+
+    async def generate(self, prompt):
+        response = await asyncio.to_thread(self._open, prompt, False)
+        with response:
+            body = json.loads(await asyncio.to_thread(response.read))
+        return self._text(body)
+
+    async def stream(self, prompt):
+        response = await asyncio.to_thread(self._open, prompt, True)
+        try:
+            while True:
+                line = await asyncio.to_thread(response.readline)
+                if not line:
+                    return
+                chunk = self._chunk(line.decode().strip())
+                if chunk is _DONE:
+                    return
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+
+
+class OpenAIBackend(_HTTPBackend):
+    """OpenAI-compatible chat completions; `url` is the API root, e.g. http://localhost:8080/v1."""
+
+    path = "/chat/completions"
+
+    def _payload(self, prompt, stream):
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+
+    def _text(self, body):
+        return body["choices"][0]["message"]["content"]
+
+    def _chunk(self, line):
+        # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return _DONE
+        return json.loads(data)["choices"][0].get("delta", {}).get("content")
+
+
+class OllamaBackend(_HTTPBackend):
+    """Ollama's generate endpoint; `url` is the server, e.g. http://localhost:11434."""
+
+    path = "/api/generate"
+
+    def _payload(self, prompt, stream):
+        return {"model": self.model, "prompt": prompt, "stream": stream}
+
+    def _text(self, body):
+        return body["response"]
+
+    def _chunk(self, line):
+        # One JSON object per line, the last with "done": true
+        if not line:
+            return None
+        item = json.loads(line)
+        return item.get("response") or (_DONE if item.get("done") else None)
@@ -0,0 +1,174 @@
+"""Process-wide bank of generated questions keyed by (animal, context).
+
+Questions live in memory and, when a path is given, in a small SQLite file
+so the bank survives app restarts. The bank is bounded by a total size and
+a per-pair size, evicts the least recently served question first, and
+drops questions older than a TTL. Serving a question only touches memory;
+when it was last served reaches the file in batches.
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from backyard.bundle import read_bundle
+from backyard.questions import question_key
+
+
+class QuestionBank:
+    """Thread-safe store of validated questions shared by every session."""
+
+    def __init__(self, path=None, max_questions=600, max_per_pair=20, ttl_seconds=30 * 24 * 3600, fresh_ratio=0.25,
+                 touch_batch=100):
+        self.max_questions = max_questions
+        self.max_per_pair = max_per_pair
+        self.ttl_seconds = ttl_seconds
+        self.fresh_ratio = fresh_ratio
+        self._lock = threading.Lock()
+        # key -> (animal, context, question_data, added_at), least recently served first
+        self._entries = OrderedDict()
+        # (animal, context) -> set of keys
+        self._pairs = {}
+        # key -> when it was last served, not yet written; flushed every
+        # `touch_batch` hits, with any other write, and on close
+        self._touched = {}
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "key TEXT PRIMARY KEY, animal TEXT, context TEXT, data TEXT, added_at REAL, last_used REAL)"
+            )
+            self._db.commit()
+            self._load()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _load(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._db.execute("DELETE FROM questions WHERE added_at < ?", (cutoff,))
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT key, animal, context, data, added_at FROM questions ORDER BY last_used"
+            ).fetchall()
+            for key, animal, context, data, added_at in rows:
+                self._insert(key, animal, context, json.loads(data), added_at)
+            self._evict()
+
+    def _insert(self, key, animal, context, question_data, added_at):
+        self._entries[key] = (animal, context, question_data, added_at)
+        self._entries.move_to_end(key)
+        self._pairs.setdefault((animal, context), set()).add(key)
+
+    def _remove(self, keys):
+        for key in keys:
+            animal, context, _, _ = self._entries.pop(key)
+            bucket = self._pairs[(animal, context)]
+            bucket.discard(key)
+            if not bucket:
+                del self._pairs[(animal, context)]
+        if self._db is not None and keys:
+            for key in keys:
+                self._touched.pop(key, None)
+            self._db.executemany("DELETE FROM questions WHERE key = ?", [(key,) for key in keys])
+            self._commit()
+
+    def _commit(self):
+        """Write pending last_used times and commit; the caller holds the lock."""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE questions SET last_used = ? WHERE key = ?", [(t, key) for key, t in self._touched.items()]
+            )
+            self._touched.clear()
+        self._db.commit()
+
+    def _evict(self, pair=None):
+        """Drop expired questions, then least recently served ones over the limits."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry[3] < cutoff]
+        self._remove(expired)
+        if pair is not None and pair in self._pairs:
+            bucket = self._pairs[pair]
+            overflow = len(bucket) - self.max_per_pair
+            if overflow > 0:
+                self._remove([key for key in self._entries if key in bucket][:overflow])
+        overflow = len(self._entries) - self.max_questions
+        if overflow > 0:
+            self._remove(list(self._entries)[:overflow])
+
+    def wants_fresh(self):
+        """Roll the freshness policy: True means generate a new question even on a hit."""
+        return random.random() < self.fresh_ratio
+
+    def take(self, animal, context, seen=None):
+        """Return a cached question for the pair that is not in `seen`, or None.
+
+        The chosen question's key is added to `seen` so the same session is
+        never served it twice.
+        """
+        with self._lock:
+            now = time.time()
+            candidates = [
+                key for key in self._pairs.get((animal, context), ())
+                if (seen is None or key not in seen) and self._entries[key][3] >= now - self.ttl_seconds
+            ]
+            if not candidates:
+                self.misses += 1
+                return None
+            self.hits += 1
+            key = random.choice(candidates)
+            self._entries.move_to_end(key)
+            if seen is not None:
+                seen.add(key)
+            if self._db is not None:
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._commit()
+            return dict(self._entries[key][2])
+
+    def add(self, animal, context, question_data, seen=None):
+        """Store a freshly generated question, marking it as seen for the caller."""
+        key = question_key(question_data["question"])
+        with self._lock:
+            if seen is not None:
+                seen.add(key)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            now = time.time()
+            self._insert(key, animal, context, dict(question_data), now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, animal, context, json.dumps(question_data), now, now),
+                )
+                self._commit()
+            self._evict((animal, context))
+
+    def load_bundle(self, path):
+        """Add every question from a pre-generated bundle; returns how many were read."""
+        count = 0
+        for question_data in read_bundle(path):
+            self.add(question_data["animal"], question_data["context"], question_data)
+            count += 1
+        return count
+
+    def stats(self):
+        """Current size plus hit and miss counters."""
+        with self._lock:
+            return {"questions": len(self._entries), "pairs": len(self._pairs), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+                self._db.close()
+                self._db = None
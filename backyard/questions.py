@@ -0,0 +1,255 @@
+"""Question generation for the Backyard Friends critter game."""
+import hashlib
+import itertools
+import random
+import re
+import threading
+
+from backyard import metrics
+from backyard.parsing import ResponseParseError, check_question, load_items, parse_question_text, repair_question
+
+# --- Animal and Context Data ---
+ANIMALS = ["squirrel", "raccoon", "possum", "cardinal", "nuthatches", "blue jay", "deer", "butterfly", "hummingbird", "chipmunk"]
+CONTEXTS = ["diet", "habitat", "behavior", "lifespan", "unique abilities", "communication"]
+
+# Times a batch is re-sent for the items that came back unusable
+BATCH_ATTEMPTS = 3
+
+
+class QuestionGenerationError(Exception):
+    """Raised when the LLM does not give us a usable question."""
+
+
+# Randomly select an animal
+def select_random_animal():
+    return random.choice(ANIMALS)
+
+# Randomly select a context
+def select_random_context():
+    return random.choice(CONTEXTS)
+
+
+def sample_pairs(count):
+    """Pick `count` distinct (animal, context) pairs."""
+    pairs = list(itertools.product(ANIMALS, CONTEXTS))
+    return random.sample(pairs, min(count, len(pairs)))
+
+
+class PairSampler:
+    """Deals (animal, context) pairs for one game without replacement.
+
+    Animals the game hasn't had yet come first, so a five-question round
+    covers five different critters. Pairs are kept as indices into
+    ANIMALS x CONTEXTS to stay small in session state; once all have been
+    dealt they are reshuffled.
+    """
+
+    __slots__ = ("_remaining", "_used_animals", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new game: every pair is available again."""
+        with self._lock:
+            self._shuffle()
+
+    def _shuffle(self):
+        order = list(range(len(ANIMALS) * len(CONTEXTS)))
+        random.shuffle(order)
+        self._remaining = bytearray(order)
+        self._used_animals = set()
+
+    def draw(self, count):
+        """The next `count` pairs of this game."""
+        pairs = []
+        with self._lock:
+            for _ in range(count):
+                if not self._remaining:
+                    self._shuffle()
+                if len(self._used_animals) == len(ANIMALS):
+                    self._used_animals.clear()
+                at = next(
+                    (i for i, pair in enumerate(self._remaining) if pair // len(CONTEXTS) not in self._used_animals), 0
+                )
+                pair = self._remaining.pop(at)
+                self._used_animals.add(pair // len(CONTEXTS))
+                pairs.append((ANIMALS[pair // len(CONTEXTS)], CONTEXTS[pair % len(CONTEXTS)]))
+        return pairs
+
+
+def question_key(question_text):
+    """Short hash of a question's text, ignoring case, spacing and punctuation."""
+    normalized = " ".join(re.sub(r"[^a-z0-9]+", " ", question_text.lower()).split())
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def build_prompt(animal, context):
+    """Build the single-question prompt for an animal and context."""
+    return f"""Generate a question about a {animal}'s {context}.
+        Provide 3 multiple choice options, and indicate the single correct answer. The format should be a JSON object with keys for "question", "options" (which is an array), "correct_answer", and "additional_fact". Do not include a title.
+
+        Here is an example of the format you should use:
+        {{
+            "question": "What do I do with the acorns that I bury?",
+            "options": ["Leave them be", "Remember their location for later", "Forget where I buried them"],
+            "correct_answer": "Forget where I buried them",
+            "additional_fact": "That helps plant thousands of trees!"
+        }}
+        """
+
+
+def build_batch_prompt(pairs):
+    """Build a prompt asking for one question per (animal, context) pair, in order."""
+    topics = "\n".join(
+        f"        {i}. a {animal}'s {context}" for i, (animal, context) in enumerate(pairs, start=1)
+    )
+    return f"""Generate {len(pairs)} questions, one for each of these topics, in this order:
+{topics}
+        For each question provide 3 multiple choice options, and indicate the single correct answer. The format should be a JSON array with one object per topic, each with keys for "question", "options" (which is an array), "correct_answer", and "additional_fact". Do not include a title.
+
+        Here is an example of one object in the array:
+        {{
+            "question": "What do I do with the acorns that I bury?",
+            "options": ["Leave them be", "Remember their location for later", "Forget where I buried them"],
+            "correct_answer": "Forget where I buried them",
+            "additional_fact": "That helps plant thousands of trees!"
+        }}
+        """
+
+
+def validate_question(question_data):
+    """Repair minor issues locally, then check the question has everything the game screen needs."""
+    try:
+        return check_question(repair_question(question_data))
+    except ResponseParseError as e:
+        raise QuestionGenerationError(str(e)) from e
+
+
+def request_question(model, animal=None, context=None):
+    """Ask the model for one question and return the parsed, validated data.
+
+    Does not touch Streamlit, so it is safe to call from a background thread.
+    """
+    animal = animal or select_random_animal()
+    context = context or select_random_context()
+    prompt = build_prompt(animal, context)
+    response = model.generate_content(prompt)
+    try:
+        question_data = parse_question(response.text if response else "")
+    except QuestionGenerationError:
+        _forget(model, prompt)
+        raise
+    question_data.update(animal=animal, context=context)
+    return question_data
+
+
+def _forget(model, prompt):
+    """Keep a response cache in front of the model from serving an unusable answer again."""
+    forget = getattr(model, "forget", None)
+    if forget is not None:
+        forget(prompt)
+
+
+def parse_question(text):
+    """Parse and validate the model's output for a single question."""
+    try:
+        with metrics.registry.timer("parse_seconds", kind="single"):
+            return parse_question_text(text)
+    except ResponseParseError as e:
+        metrics.registry.inc("parse_failures_total", kind="single")
+        raise QuestionGenerationError(str(e)) from e
+
+
+def _parse_batch(text, count):
+    """Split a batch response into `count` slots; a slot is None if its item was unusable."""
+    with metrics.registry.timer("parse_seconds", kind="batch"):
+        items = load_items(text)
+        slots = []
+        for i in range(count):
+            try:
+                slots.append(validate_question(items[i]) if i < len(items) else None)
+            except QuestionGenerationError:
+                slots.append(None)
+    metrics.registry.inc("parse_failures_total", slots.count(None), kind="batch")
+    return slots
+
+
+def request_question_batch(model, pairs, attempts=BATCH_ATTEMPTS):
+    """Generate one question per pair with a single LLM call per attempt.
+
+    Items are validated one by one; only the pairs whose items failed are
+    asked for again. A pair may appear more than once to get several
+    questions about it. Returns the questions that succeeded, in pair order.
+    """
+    results = {}
+    outstanding = list(range(len(pairs)))
+    last_error = None
+    for _ in range(attempts):
+        if not outstanding:
+            break
+        prompt = build_batch_prompt([pairs[i] for i in outstanding])
+        try:
+            response = model.generate_content(prompt)
+            text = response.text if response else ""
+        except Exception as e:
+            last_error = e
+            continue
+        slots = _parse_batch(text, len(outstanding))
+        if None in slots:
+            _forget(model, prompt)
+        for i, question_data in zip(outstanding, slots):
+            if question_data is not None:
+                question_data.update(animal=pairs[i][0], context=pairs[i][1])
+                results[i] = question_data
+        outstanding = [i for i in outstanding if i not in results]
+
+    if not results:
+        raise QuestionGenerationError(f"Batch of {len(pairs)} questions failed: {last_error or 'no usable items'}")
+    return [results[i] for i in sorted(results)]
+
+
+def request_questions(model, count, bank=None, seen=None, sampler=None):
+    """Generate `count` questions about distinct animal/context pairs.
+
+    Pairs come from `sampler` (a PairSampler) when given, so they don't
+    repeat within a game. With a question bank, cached questions the
+    session has not seen are served first and only the remaining pairs go
+    to the model. Everything generated is added to the bank; generated
+    questions already in `seen` are dropped, so fewer than `count` may
+    come back.
+    """
+    pairs = sampler.draw(count) if sampler is not None else sample_pairs(count)
+    questions = {}
+    if bank is not None:
+        for animal, context in pairs:
+            if bank.wants_fresh():
+                continue
+            cached = bank.take(animal, context, seen)
+            if cached is not None:
+                questions[(animal, context)] = cached
+
+    missing = [pair for pair in pairs if pair not in questions]
+    generated = []
+    try:
+        if len(missing) == 1:
+            generated = [request_question(model, *missing[0])]
+        elif missing:
+            generated = request_question_batch(model, missing)
+    except Exception:
+        # Still worth returning what the bank had
+        if not questions:
+            raise
+    for question_data in generated:
+        key = question_key(question_data["question"])
+        if seen is not None and key in seen:
+            # The model repeated a question this session has already had
+            metrics.registry.inc("duplicate_questions_total")
+            continue
+        if seen is not None and bank is None:
+            seen.add(key)
+        if bank is not None:
+            bank.add(question_data["animal"], question_data["context"], question_data, seen)
+        questions[(question_data["animal"], question_data["context"])] = question_data
+    return [questions[pair] for pair in pairs if pair in questions]
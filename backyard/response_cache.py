@@ -0,0 +1,95 @@
+"""Response cache for identical prompts, with single-flight for calls in progress.
+
+Keys are a hash of the model name and the full prompt text. While a call
+for a key is running, later callers for the same key wait on that call
+instead of starting their own; once it finishes the text is kept for
+`ttl_seconds`, up to `max_entries` responses. Errors are never cached.
+
+Everything runs on the LLM client's event loop, so no locking is needed.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+
+def cache_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """TTL + LRU cache of response text that coalesces concurrent identical calls."""
+
+    def __init__(self, ttl_seconds=60.0, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, text)
+        self._in_flight = {}  # key -> asyncio.Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def _store(self, key, text):
+        self._entries[key] = (time.monotonic(), text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Forget a cached response, e.g. one that turned out to be unusable."""
+        self._entries.pop(key, None)
+
+    async def get_or_call(self, key, call):
+        """Return cached text for `key`, join a call already running, or await `call()`."""
+        text = self._lookup(key)
+        if text is not None:
+            self.hits += 1
+            return text
+        in_flight = self._in_flight.get(key)
+        # A call left over from an event loop that has since died never finishes
+        if in_flight is not None and in_flight.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            text = await call()
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; keep asyncio from warning about it
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self._store(key, text)
+            future.set_result(text)
+            return text
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self):
+        """Hit/miss/coalesced counters and how many model calls they saved."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "calls_saved": self.hits + self.coalesced,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,163 @@
+"""Finished games, kept in SQLite for a leaderboard across every player.
+
+Games are only ever appended. `record` queues a game and returns at once;
+a writer thread inserts the queue in one transaction every
+`flush_interval` seconds, or sooner once `batch_size` games are waiting.
+The database runs in WAL mode, so leaderboard reads never wait for the
+writer. The leaderboard is ordered by an index that matches its ORDER BY,
+so it reads only the top rows however many games there are, and includes
+games still waiting to be written.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from backyard import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    answers TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    answer_seconds TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_leaderboard ON games (score DESC, seconds, finished_at);
+"""
+COLUMNS = ("finished_at", "score", "total", "answers", "seconds", "answer_seconds")
+# Tries at writing what is still queued when the store closes
+FINAL_FLUSH_ATTEMPTS = 3
+
+
+def game_result(score, total, answers, answer_seconds, finished_at=None):
+    """A finished game as the store keeps it.
+
+    `answers` has one "1" (right) or "0" (wrong) per question, and
+    `answer_seconds` how long each answer took; their sum ranks ties.
+    """
+    return {
+        "finished_at": finished_at or time.time(),
+        "score": score,
+        "total": total,
+        "answers": answers,
+        "seconds": round(sum(answer_seconds), 3),
+        "answer_seconds": json.dumps([round(s, 2) for s in answer_seconds]),
+    }
+
+
+def _rank(result):
+    return (-result["score"], result["seconds"], result["finished_at"])
+
+
+class ResultsStore:
+    """Append-only store of finished games with a batched background writer."""
+
+    def __init__(self, path, batch_size=100, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._error = None
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.close()
+        self._reader = self._connect()
+        self._reader_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="results-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a crash can lose the last commits but never corrupts
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def record(self, result):
+        """Queue a game from game_result() for writing."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ResultsStore is closed")
+            self._pending.append(result)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def _write_loop(self):
+        db = self._connect()
+        insert = f"INSERT INTO games ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        final_attempts = FINAL_FLUSH_ATTEMPTS
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                batch = self._pending[:]
+                closed = self._closed
+            if batch:
+                try:
+                    with metrics.registry.timer("results_flush_seconds"):
+                        with db:
+                            db.executemany(insert, [tuple(r[c] for c in COLUMNS) for r in batch])
+                except sqlite3.Error as e:
+                    # Disk full, locked by another process...; the batch stays queued for the next round
+                    metrics.registry.inc("results_write_errors_total")
+                    self._error = e
+                    if closed:
+                        final_attempts -= 1
+                        if not final_attempts:
+                            # Left in pending for close() to report
+                            db.close()
+                            return
+                    continue
+                with self._lock:
+                    # Only now drop them from pending, so readers never miss a game
+                    del self._pending[:len(batch)]
+                    self.written += len(batch)
+                self._error = None
+            if closed:
+                db.close()
+                return
+
+    def leaderboard(self, limit=10):
+        """The `limit` best games, highest score first and quickest answers breaking ties."""
+        with metrics.registry.timer("leaderboard_seconds"):
+            with self._lock:
+                pending = list(self._pending)
+            with self._reader_lock:
+                rows = self._reader.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM games ORDER BY score DESC, seconds, finished_at LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            games = [dict(zip(COLUMNS, row)) for row in rows]
+            # A batch being committed right now can be in both
+            stored = {_rank(game) for game in games}
+            games += [game for game in pending if _rank(game) not in stored]
+            return sorted(games, key=_rank)[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._pending), "written": self.written}
+
+    def close(self):
+        """Write everything still queued and stop the writer.
+
+        Raises RuntimeError if some games could not be written; they are
+        still counted as pending in stats().
+        """
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self._writer.join()
+        with self._reader_lock:
+            self._reader.close()
+        with self._lock:
+            lost = len(self._pending)
+        if lost:
+            metrics.registry.inc("results_dropped_total", lost)
+            raise RuntimeError(f"{lost} games could not be written to {self.path}: {self._error}")
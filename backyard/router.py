@@ -0,0 +1,216 @@
+"""Routing LLM calls across several model backends.
+
+ModelRouter looks like a single backend to LLMClient, so caching, retries
+and hedging still wrap it. Each call goes to the backend with the lowest
+expected wait: its latency estimate times the calls it already has in
+flight, penalised by its smoothed error rate. If that backend errors the
+call fails over to the next one straight away. The latency estimate is a
+peak EWMA: it jumps to a slow observation at once and decays gradually,
+so traffic moves off a backend the moment it slows down.
+
+Every backend also has a circuit breaker. It opens after a run of
+failures, where calls slower than `slow_after` count as failures, and
+takes the backend out of rotation for `cooldown` seconds. After that a
+single trial call decides whether it comes back.
+"""
+import asyncio
+import random
+import time
+
+from backyard import metrics
+
+
+class CircuitBreaker:
+    """closed -> open (no traffic) -> half open (one trial call) -> closed or open again."""
+
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.trips = 0
+
+    def available(self, now):
+        """Whether a call may go through now."""
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "half_open":
+            return not self.trial_running
+        return self.state == "closed"
+
+    def trip(self, now):
+        """Open the breaker, or restart the cool-down if it already is."""
+        if self.state != "open":
+            self.trips += 1
+        self.state = "open"
+        self.opened_at = now
+        self.failures = 0
+
+
+class Route:
+    """One backend and what the router has seen of it."""
+
+    def __init__(self, backend, timeout=None, weight=1.0, breaker=None):
+        self.backend = backend
+        self.name = backend.name
+        # Per-call cutoff, so a hung backend can't use up the client's whole timeout
+        self.timeout = timeout
+        # Multiplies the score; above 1 makes a backend a fallback, below 1 a favourite
+        self.weight = weight
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = None  # peak-EWMA seconds per call
+        self.error_rate = 0.0  # smoothed share of calls that failed
+        self.in_flight = 0
+        self.calls = 0
+
+    def score(self, error_penalty):
+        # Backends not tried yet score 0, so each gets a first call
+        expected_wait = (self.latency or 0.0) * (self.in_flight + 1)
+        return expected_wait * (1 + error_penalty * self.error_rate) * self.weight
+
+
+class ModelRouter:
+    """Backend that spreads calls over `routes` by observed latency and error rate.
+
+    `alpha` is the smoothing factor for latency and error rate. A share of
+    `explore` calls go to a random healthy backend, so the figures for the
+    ones not currently favoured stay fresh.
+    """
+
+    def __init__(self, routes, alpha=0.2, slow_after=None, error_penalty=4.0, explore=0.02, name="router"):
+        if not routes:
+            raise ValueError("ModelRouter needs at least one route")
+        self.routes = routes
+        self.alpha = alpha
+        self.slow_after = slow_after
+        self.error_penalty = error_penalty
+        self.explore = explore
+        self.name = name
+
+    def _candidates(self):
+        """Routes to try, best first; if every breaker is open, the one that opened longest ago."""
+        now = time.monotonic()
+        available = sorted(
+            (route for route in self.routes if route.breaker.available(now)),
+            key=lambda route: route.score(self.error_penalty),
+        )
+        if not available:
+            return [min(self.routes, key=lambda route: route.breaker.opened_at)]
+        if len(available) > 1 and random.random() < self.explore:
+            available.insert(0, available.pop(random.randrange(1, len(available))))
+        return available
+
+    def _start(self, route):
+        """Count the call in; returns its start time and whether it is the half-open trial."""
+        trial = route.breaker.state == "half_open"
+        if trial:
+            route.breaker.trial_running = True
+        route.calls += 1
+        route.in_flight += 1
+        return time.monotonic(), trial
+
+    def _abandon(self, route, trial):
+        # Cancelled, e.g. the losing copy of a hedged call; not the backend's fault
+        if trial:
+            route.breaker.trial_running = False
+        route.in_flight -= 1
+
+    def _record(self, route, started, trial, error=None):
+        seconds = time.monotonic() - started
+        breaker = route.breaker
+        route.in_flight -= 1
+        route.error_rate += self.alpha * ((error is not None) - route.error_rate)
+        # Fast failures say nothing about speed; timeouts do
+        if error is None or isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            if route.latency is None or seconds > route.latency or trial:
+                route.latency = seconds
+            else:
+                route.latency += self.alpha * (seconds - route.latency)
+        metrics.registry.observe("llm_route_seconds", seconds, backend=route.name)
+        if error is not None:
+            metrics.registry.inc("llm_route_failures_total", backend=route.name)
+
+        slow = self.slow_after is not None and seconds > self.slow_after
+        bad = error is not None or slow
+        if trial:
+            # Only the trial call decides a half-open breaker
+            breaker.trial_running = False
+            if bad:
+                self._trip(route)
+            else:
+                breaker.state = "closed"
+                breaker.failures = 0
+        elif breaker.state == "closed":
+            # Calls that started before the breaker opened don't move it
+            breaker.failures = breaker.failures + 1 if bad else 0
+            if breaker.failures >= breaker.failure_threshold:
+                self._trip(route)
+
+    def _trip(self, route):
+        if route.breaker.state != "open":
+            metrics.registry.inc("llm_route_trips_total", backend=route.name)
+        route.breaker.trip(time.monotonic())
+
+    async def _call(self, route, prompt):
+        if route.timeout is None:
+            return await route.backend.generate(prompt)
+        return await asyncio.wait_for(route.backend.generate(prompt), route.timeout)
+
+    async def generate(self, prompt):
+        last_error = None
+        for route in self._candidates():
+            started, trial = self._start(route)
+            try:
+                text = await self._call(route, prompt)
+            except Exception as e:
+                self._record(route, started, trial, e)
+                last_error = e
+                continue
+            except BaseException:
+                self._abandon(route, trial)
+                raise
+            self._record(route, started, trial)
+            return text
+        raise last_error
+
+    async def stream(self, prompt):
+        """Stream from the best backend, failing over only if it breaks before the first chunk."""
+        last_error = None
+        for route in self._candidates():
+            started, trial = self._start(route)
+            sent = False
+            try:
+                if hasattr(route.backend, "stream"):
+                    async for chunk in route.backend.stream(prompt):
+                        sent = True
+                        yield chunk
+                else:
+                    yield await self._call(route, prompt)
+            except Exception as e:
+                self._record(route, started, trial, e)
+                if sent:
+                    raise
+                last_error = e
+                continue
+            except BaseException:
+                self._abandon(route, trial)
+                raise
+            self._record(route, started, trial)
+            return
+        raise last_error
+
+    def stats(self):
+        """Per-backend state for metrics: breaker state, smoothed latency and error rate, calls."""
+        return {
+            route.name: {
+                "state": route.breaker.state,
+                "latency": route.latency or 0.0,
+                "error_rate": route.error_rate,
+                "calls": route.calls,
+                "in_flight": route.in_flight,
+                "trips": route.breaker.trips,
+            }
+            for route in self.routes
+        }
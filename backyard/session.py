@@ -0,0 +1,143 @@
+"""Compact per-session game state, plus eviction of idle sessions.
+
+Every open browser tab keeps one of these alive for as long as Streamlit
+holds its session, so it stores scalars in slots and remembers questions
+by their bank key rather than by their text.
+"""
+import threading
+import time
+import weakref
+from array import array
+from dataclasses import dataclass, field
+
+from backyard.questions import PairSampler
+
+
+class RecentKeys:
+    """Set-like record of the last `maxlen` question keys, oldest dropped first.
+
+    Supports what the question bank and deck use on `seen`: `in` and `add`.
+    The 64-bit hex keys are packed into a ring buffer at 8 bytes each; a
+    scan of a few hundred of them is cheaper than a set of strings is big.
+    """
+
+    __slots__ = ("maxlen", "_keys", "_next")
+
+    def __init__(self, maxlen=200):
+        self.maxlen = maxlen
+        self._keys = array("Q")
+        self._next = 0
+
+    def __contains__(self, key):
+        return int(key, 16) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key):
+        key = int(key, 16)
+        if key in self._keys:
+            return
+        if len(self._keys) < self.maxlen:
+            self._keys.append(key)
+        else:
+            self._keys[self._next] = key
+            self._next = (self._next + 1) % self.maxlen
+
+    def clear(self):
+        self._keys = array("Q")
+        self._next = 0
+
+
+@dataclass(slots=True, weakref_slot=True, eq=False)
+class PlayerState:
+    """Everything one session needs, stored under a single session_state key."""
+
+    screen: str = "landing"
+    score: int = 0
+    answered: bool = False
+    glass_revealed: bool = False
+    total_questions: int = 5
+    question_number: int = 0
+    intro_animation_played: bool = False
+    current_question: dict = None
+    # (wrong, right) answer lines for the current question, built when it is shown
+    feedback: tuple = None
+    last_answer: str = ""
+    # For the results store: "1"/"0" per answer, and seconds each answer took
+    shown_at: float = 0.0
+    answers: str = ""
+    answer_seconds: array = field(default_factory=lambda: array("f"))
+    # Bank keys of this game's questions, and of every question served lately
+    questions_asked: set = field(default_factory=set)
+    questions_seen: RecentKeys = field(default_factory=RecentKeys)
+    # Animal/context pairs still to come this game
+    pairs: PairSampler = field(default_factory=PairSampler)
+    # Script executions, for the session and for the current game
+    script_runs: int = 0
+    game_script_runs: int = 0
+    prefetcher: object = None
+    # The landing screen's warm-up thread, until the game screen joins it
+    warm_up_thread: object = None
+    last_active: float = field(default_factory=time.monotonic)
+
+    def new_game(self):
+        """Reset the per-game fields, keeping the session's question history."""
+        self.release()
+        self.score = 0
+        self.answered = False
+        self.question_number = 0
+        self.current_question = None
+        self.feedback = None
+        self.answers = ""
+        self.answer_seconds = array("f")
+        self.questions_asked = set()
+        self.pairs.reset()
+        self.intro_animation_played = False
+
+    def release(self):
+        """Stop background work and drop questions fetched ahead of time."""
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+            self.prefetcher = None
+
+
+class SessionRegistry:
+    """Tracks live sessions and frees what idle ones hold.
+
+    Sessions are held weakly, so one that Streamlit has dropped just
+    disappears. A session idle for `idle_seconds` loses its prefetched
+    questions and its question history; its place in the game survives.
+    """
+
+    def __init__(self, idle_seconds=15 * 60, sweep_every=60):
+        self.idle_seconds = idle_seconds
+        self.sweep_every = sweep_every
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def touch(self, state):
+        """Mark `state` active now, sweeping idle sessions when one is due."""
+        now = time.monotonic()
+        state.last_active = now
+        with self._lock:
+            self._sessions.add(state)
+            if now - self._last_sweep < self.sweep_every:
+                return
+            self._last_sweep = now
+            idle = [s for s in self._sessions if now - s.last_active > self.idle_seconds]
+        for s in idle:
+            self.evict(s)
+
+    def evict(self, state):
+        state.release()
+        state.questions_seen.clear()
+        with self._lock:
+            self._sessions.discard(state)
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            return {"live": len(self._sessions), "evicted": self.evicted}
@@ -0,0 +1,96 @@
+"""Local stand-ins for HTTP model servers, backed by FakeModel.
+
+One server answers both wire formats the providers module speaks:
+OpenAI-compatible `/v1/chat/completions` (as llama.cpp, vLLM and hosted
+APIs do) and Ollama's `/api/generate`, streamed or not. Latency, errors
+and malformed output come from the FakeModel behind it, and can be
+changed while the server runs to see how the router reacts.
+
+    python -m backyard.standin_servers --port 8001 --latency 0.3 --error-rate 0.1
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backyard.fake_model import FakeBackendError, FakeModel
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            prompt, wire = body["messages"][-1]["content"], "openai"
+        elif self.path == "/api/generate":
+            prompt, wire = body["prompt"], "ollama"
+        else:
+            self.send_error(404)
+            return
+        model = self.server.model
+        try:
+            response = model.generate_content(prompt, stream=bool(body.get("stream")))
+        except FakeBackendError as e:
+            self.send_error(e.code, "injected failure")
+            return
+
+        if not body.get("stream"):
+            if wire == "openai":
+                payload = {"choices": [{"message": {"role": "assistant", "content": response.text}}]}
+            else:
+                payload = {"model": body.get("model"), "response": response.text, "done": True}
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        # Streamed: the body ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if wire == "openai" else "application/x-ndjson")
+        self.end_headers()
+        for chunk in response:
+            if wire == "openai":
+                line = "data: " + json.dumps({"choices": [{"delta": {"content": chunk.text}}]}) + "\n\n"
+            else:
+                line = json.dumps({"response": chunk.text, "done": False}) + "\n"
+            self.wfile.write(line.encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n" if wire == "openai" else b'{"response": "", "done": true}\n')
+
+    def log_message(self, *args):
+        pass
+
+
+def start_standin_server(model=None, port=0, host="127.0.0.1"):
+    """Serve `model` (a FakeModel) on a daemon thread; returns the server, whose `url` is its address."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.model = model or FakeModel()
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a stand-in OpenAI/Ollama model server backed by FakeModel.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 429/503")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of responses that are malformed")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    model = FakeModel(latency=args.latency, error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+                      seed=args.seed, model_name=f"standin:{args.port}")
+    server = start_standin_server(model, args.port, args.host)
+    print(f"Serving {server.url}/v1/chat/completions and {server.url}/api/generate; Ctrl-C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Precompiled question decks served without any LLM.
+
+A deck file is one JSON header line followed by one compact JSON record
+per line:
+
+    {"version": 1, "index": {"animal|context": [[offset, length], ...]}}
+    {"question": ..., "options": [...], "correct_answer": ..., "additional_fact": ...}
+    ...
+
+Offsets are relative to the first byte after the header. The file is
+memory-mapped and only the small header is parsed up front, so drawing a
+question costs one dict lookup and one slice + json.loads of a single record.
+
+    python -m backyard.static_deck question_bundle.json.gz decks/backyard.deck
+"""
+import json
+import mmap
+import random
+import sys
+
+from backyard.bundle import read_bundle
+from backyard.questions import question_key, sample_pairs
+
+DECK_VERSION = 1
+
+
+def write_deck(path, questions):
+    """Compile questions (dicts carrying "animal" and "context") into a deck file."""
+    index = {}
+    records = []
+    offset = 0
+    for question_data in questions:
+        item = {k: v for k, v in question_data.items() if k not in ("animal", "context")}
+        record = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        index.setdefault(f"{question_data['animal']}|{question_data['context']}", []).append([offset, len(record) - 1])
+        records.append(record)
+        offset += len(record)
+    header = json.dumps({"version": DECK_VERSION, "index": index}, separators=(",", ":")).encode() + b"\n"
+    with open(path, "wb") as f:
+        f.write(header)
+        f.writelines(records)
+    return len(records)
+
+
+class StaticDeck:
+    """Read-only, memory-mapped deck with O(1) access by (animal, context)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = self._mmap.find(b"\n") + 1
+        header = json.loads(self._mmap[:header_end])
+        if header.get("version") != DECK_VERSION:
+            raise ValueError(f"Unsupported deck version: {header.get('version')}")
+        self._data_start = header_end
+        self._index = {tuple(pair.split("|", 1)): spans for pair, spans in header["index"].items()}
+
+    def __len__(self):
+        return sum(len(spans) for spans in self._index.values())
+
+    def pairs(self):
+        return list(self._index)
+
+    def _read(self, span):
+        start = self._data_start + span[0]
+        return json.loads(self._mmap[start:start + span[1]])
+
+    def get(self, animal, context, seen=None):
+        """A random question for the pair that is not in `seen`, or None."""
+        spans = self._index.get((animal, context))
+        if not spans:
+            return None
+        for span in random.sample(spans, len(spans)):
+            question_data = self._read(span)
+            key = question_key(question_data["question"])
+            if seen is None or key not in seen:
+                if seen is not None:
+                    seen.add(key)
+                return dict(question_data, animal=animal, context=context)
+        return None
+
+    def draw(self, seen=None):
+        """A question from any pair the session hasn't been served yet, or None once the deck runs out."""
+        for animal, context in sample_pairs(len(self._index) or 1):
+            question_data = self.get(animal, context, seen)
+            if question_data is not None:
+                return question_data
+        return None
+
+    def close(self):
+        self._mmap.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m backyard.static_deck BUNDLE DECK")
+    print(f"Wrote {write_deck(sys.argv[2], read_bundle(sys.argv[1]))} questions to {sys.argv[2]}")
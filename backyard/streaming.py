@@ -0,0 +1,79 @@
+"""Incremental parsing of a question while the model is still streaming it.
+
+The model writes one JSON object field by field. PartialQuestionParser
+picks out each string field as soon as its closing quote arrives, and the
+options one at a time, so the screen can show the question before the
+rest of the answer exists.
+"""
+import json
+import re
+
+from backyard.questions import parse_question
+
+# A complete JSON string literal, escapes included
+_STRING = r'"((?:[^"\\]|\\.)*)"'
+_FIELDS = {
+    name: re.compile(rf'"{name}"\s*:\s*{_STRING}')
+    for name in ("question", "correct_answer", "additional_fact")
+}
+_OPTIONS_START = re.compile(r'"options"\s*:\s*\[')
+_OPTION = re.compile(rf'\s*,?\s*{_STRING}')
+
+
+def _unescape(raw):
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
+
+
+class PartialQuestion:
+    """What has arrived so far; fields stay None until they are complete."""
+
+    __slots__ = ("question", "options", "options_complete", "correct_answer", "additional_fact")
+
+    def __init__(self):
+        self.question = None
+        self.options = []
+        self.options_complete = False
+        self.correct_answer = None
+        self.additional_fact = None
+
+
+class PartialQuestionParser:
+    """Feed streamed chunks in; read back the fields that are complete."""
+
+    def __init__(self):
+        self.text = ""
+        self.partial = PartialQuestion()
+
+    def feed(self, chunk):
+        self.text += chunk
+        partial = self.partial
+        for name, pattern in _FIELDS.items():
+            if getattr(partial, name) is None:
+                match = pattern.search(self.text)
+                if match:
+                    setattr(partial, name, _unescape(match.group(1)))
+        if not partial.options_complete:
+            self._scan_options()
+        return partial
+
+    def _scan_options(self):
+        start = _OPTIONS_START.search(self.text)
+        if not start:
+            return
+        options = []
+        pos = start.end()
+        while True:
+            match = _OPTION.match(self.text, pos)
+            if not match:
+                break
+            options.append(_unescape(match.group(1)))
+            pos = match.end()
+        self.partial.options = options
+        self.partial.options_complete = bool(re.match(r"\s*,?\s*\]", self.text[pos:]))
+
+    def result(self):
+        """Parse and validate the whole response once the stream has ended."""
+        return parse_question(self.text)
@@ -0,0 +1,183 @@
+"""Named colour themes and the stylesheet built from them.
+
+The stylesheet is rendered and minified once per theme and reused on
+every rerun; changing a theme's values gives it a new cache key, so the
+next rerun picks up the change.
+"""
+import functools
+import re
+
+THEMES = {
+    "christmas": {
+        "background_color": "#f70696",
+        "text_color": "#ffffff",
+        "button_text_color": "#333333",
+        "button_color": "#ffffff",
+        "button_hover_color": "#f0f0f0",
+        "accent_color": "#ffffff",
+        "font_family": "serif",
+        "padding": "30px",
+        "border_color": "#ffffff"
+    },
+    "evergreen": {
+        "background_color": "#1e5631",
+        "text_color": "#fdfcf5",
+        "button_text_color": "#1e5631",
+        "button_color": "#fdfcf5",
+        "button_hover_color": "#e8e4d0",
+        "accent_color": "#f4d35e",
+        "font_family": "serif",
+        "padding": "30px",
+        "border_color": "#f4d35e"
+    },
+}
+
+CSS_TEMPLATE = """
+        <style>
+        body {{
+            background-color: {background_color};
+            color: {text_color};
+            font-family: {font_family};
+            margin: 0;
+        }}
+        .stApp {{
+            max-width: 100%;
+            background-color: {background_color};
+            padding: {padding};
+            margin: 0;
+            display: flex;
+            flex-direction: column;
+            align-items: center;
+        }}
+         .title-text {{
+            color: {accent_color};
+            font-size: 2.8em;
+            text-align: center;
+            padding-bottom: 15px;
+            line-height: 1.2;
+            font-weight: bold;
+            animation: fadeIn 1.2s ease-out;
+        }}
+        .small-text {{
+            color: {text_color};
+            font-size: 1.1em;
+            text-align: center;
+            padding-bottom: 25px;
+            line-height: 1.4;
+            animation: fadeIn 1.2s ease-out;
+        }}
+         .score-text {{
+            color: {text_color};
+            font-size: 1.4em;
+            text-align: center;
+            padding-bottom: 15px;
+             font-weight: bold;
+        }}
+        .gift-card {{
+            background-color: transparent;
+            text-align: center;
+            padding: 20px;
+            margin: 20px auto;
+            max-width: 700px;
+            border-radius: 10px;
+            border: 1px solid {border_color};
+            animation: fadeIn 1.2s ease-out;
+        }}
+        .button-container {{
+            text-align: center;
+            margin: 20px auto;
+            max-width: 400px;
+            animation: fadeIn 1.2s ease-out;
+        }}
+       .stButton>button {{
+            background-color: {button_color};
+            color: {button_text_color};
+            padding: 12px 25px;
+            border-radius: 8px;
+            border: none;
+            cursor: pointer;
+            transition: all 0.3s ease;
+            font-size: 1.1em;
+            min-width: 175px;
+            width: 100%;
+            margin-bottom: 10px;
+            box-shadow: 0 2px 5px rgba(0,0,0,0.2);
+        }}
+        .stButton>button:hover {{
+            background-color: {button_hover_color};
+            transform: translateY(-3px);
+            box-shadow: 0 4px 10px rgba(0,0,0,0.3);
+        }}
+        .message-box {{
+            background-color: transparent;
+            padding: 25px;
+            margin: 25px auto;
+            text-align: center;
+            line-height: 1.7;
+            max-width: 900px;
+            border-radius: 10px;
+            border: 1px solid {border_color};
+            animation: fadeIn 1.2s ease-out;
+        }}
+        .image-container {{
+            text-align: center;
+            padding: 25px;
+            margin: 15px auto;
+            max-width: 700px;
+            animation: fadeIn 1.2s ease-out;
+        }}
+        .info-container {{
+            background-color: transparent;
+            padding: 20px;
+            margin: 20px auto;
+            text-align: center;
+            line-height: 1.6;
+            max-width: 900px;
+            border-radius: 10px;
+            border: 1px solid {border_color};
+             animation: fadeIn 1.2s ease-out;
+        }}
+          .option-button-row {{
+            display: flex;
+            flex-direction: column;
+            align-items: center;
+            margin: 10px auto; /* Added margin for spacing */
+            max-width: 400px;
+        }}
+        a {{
+            color: {accent_color};
+            text-decoration: none;
+            transition: all 0.3s ease;
+        }}
+        a:hover {{
+            text-decoration: underline;
+            opacity: 0.8;
+        }}
+        @keyframes fadeIn {{
+            from {{ opacity: 0; }}
+            to {{ opacity: 1; }}
+        }}
+        @keyframes slideInFromBottom {{
+            from {{transform: translateY(100px); opacity: 0;}}
+            to {{ transform: translateY(0); opacity: 1; }}
+        }}
+        </style>
+"""
+
+
+def minify_css(css):
+    """Drop comments and the whitespace the browser doesn't need."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+@functools.lru_cache(maxsize=16)
+def _compile(theme_items):
+    return minify_css(CSS_TEMPLATE.format(**dict(theme_items)))
+
+
+def stylesheet(theme):
+    """The minified <style> block for a theme dict, built once per distinct theme."""
+    return _compile(tuple(sorted(theme.items())))
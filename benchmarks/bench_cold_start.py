@@ -0,0 +1,57 @@
+"""Time to first paint of the landing screen in a fresh process.
+
+Each run starts a new interpreter, so nothing is imported yet, and
+times the first script run of the landing screen through AppTest. This is
+what the first visitor after a deploy or restart waits for.
+
+"before" imports google.generativeai at the start of that run, the way
+the module-level import used to. "after" is the app as it is: the import
+and client setup happen on the warm-up thread, so the paint doesn't wait
+for them.
+
+    python benchmarks/bench_cold_start.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+CHILD = """
+import time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.secrets["google"] = {{"api_key": "benchmark"}}
+at.secrets["llm"] = {{"timeout": 1, "max_retries": 0}}
+at.secrets["question_bank"] = {{"path": ""}}
+start = time.perf_counter()
+if {before}:
+    import google.generativeai
+at.run()
+elapsed = time.perf_counter() - start
+assert not at.exception, at.exception
+print(elapsed)
+"""
+
+
+def first_paint(before):
+    code = CHILD.format(app=os.path.join(ROOT, "elizabeth-gift.py"), before=before)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    ).stdout
+    return float(out)
+
+
+def main():
+    for label, before in (("before", True), ("after", False)):
+        times = [first_paint(before) for _ in range(RUNS)]
+        print(f"{label:6}: first paint median {statistics.median(times) * 1000:6.0f} ms, min {min(times) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
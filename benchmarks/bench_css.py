@@ -0,0 +1,41 @@
+"""Bytes and time spent on the stylesheet per rerun, before and after caching.
+
+"Before" renders the full template on every call, the way apply_custom_css
+used to with its f-string. "After" is the memoized, minified stylesheet.
+Streamlit drops any element a rerun doesn't emit again, so the stylesheet
+still goes out on every rerun; what shrinks is its size and the work to
+build it.
+
+    python benchmarks/bench_css.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backyard.theme import CSS_TEMPLATE, THEMES, stylesheet  # noqa: E402
+
+# Reruns in one full playthrough (landing -> 5 questions -> gift -> note),
+# counting the extra st.rerun() after each click
+RERUNS_PER_GAME = 29
+
+
+def before(theme):
+    return CSS_TEMPLATE.format(**theme)
+
+
+def main():
+    theme = THEMES["christmas"]
+    old, new = before(theme).encode(), stylesheet(theme).encode()
+    runs = 20000
+    old_us = timeit.timeit(lambda: before(theme), number=runs) / runs * 1e6
+    new_us = timeit.timeit(lambda: stylesheet(theme), number=runs) / runs * 1e6
+    print(f"{'':8} {'bytes/rerun':>12} {'bytes/game':>11} {'µs/rerun':>9}")
+    print(f"{'before':8} {len(old):12,} {len(old) * RERUNS_PER_GAME:11,} {old_us:9.2f}")
+    print(f"{'after':8} {len(new):12,} {len(new) * RERUNS_PER_GAME:11,} {new_us:9.2f}")
+    print(f"saved {1 - len(new) / len(old):.0%} of stylesheet bytes per rerun")
+
+
+if __name__ == "__main__":
+    main()
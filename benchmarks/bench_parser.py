@@ -0,0 +1,63 @@
+"""Compare the tolerant question parser with the original regex + json.loads path.
+
+Runs both over benchmarks/malformed_responses.jsonl, a corpus of model
+responses in the shapes we have seen go wrong, and reports how many
+parse into a playable question and how long a parse takes.
+Each row's "expect" says whether the tolerant parser should get the
+question out of it or give up; tests/test_parsing.py holds it to that.
+
+    python benchmarks/bench_parser.py
+"""
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backyard.parsing import ResponseParseError, parse_question_text  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "malformed_responses.jsonl")
+
+
+def original_parse(text):
+    """What generate_question_data did before backyard.parsing existed."""
+    question_data = text.strip()
+    match = re.match(r'```(?:json)?\s*(.*?)\s*```', question_data, re.DOTALL)
+    if match:
+        question_data = match.group(1).strip()
+    data = json.loads(question_data)
+    if data["correct_answer"] not in data["options"] or not data["additional_fact"]:
+        raise ValueError("unplayable")
+    return data
+
+
+def succeeds(parse, text):
+    try:
+        parse(text)
+        return True
+    except (ValueError, KeyError, TypeError, AttributeError, ResponseParseError):
+        return False
+
+
+def main():
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f]
+
+    print(f"{'response':32} original  tolerant")
+    for row in corpus:
+        print(f"{row['note']:32} {'ok' if succeeds(original_parse, row['text']) else '-':8}  "
+              f"{'ok' if succeeds(parse_question_text, row['text']) else '-'}")
+
+    print()
+    for name, parse in (("original", original_parse), ("tolerant", parse_question_text)):
+        ok = sum(succeeds(parse, row["text"]) for row in corpus)
+        runs = 200
+        seconds = timeit.timeit(lambda: [succeeds(parse, row["text"]) for row in corpus], number=runs)
+        print(f"{name:9} {ok}/{len(corpus)} parsed ({ok / len(corpus):.0%}), "
+              f"{seconds / (runs * len(corpus)) * 1e6:.1f} µs/parse")
+
+
+if __name__ == "__main__":
+    main()
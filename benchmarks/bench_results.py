@@ -0,0 +1,91 @@
+"""Results store: write throughput and leaderboard speed.
+
+Writes: ROWS games recorded through ResultsStore (queued, one transaction
+per batch) against the plain way, one INSERT and commit per game.
+
+Leaderboard: the top 10 out of LEADERBOARD_ROWS games, with the
+games_leaderboard index and with it dropped, so SQLite has to sort the
+whole table.
+
+    python benchmarks/bench_results.py
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backyard.results import COLUMNS, SCHEMA, ResultsStore, game_result  # noqa: E402
+
+ROWS = 20_000
+LEADERBOARD_ROWS = 1_000_000
+QUERIES = 20
+
+
+def games(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        answers = "".join(rng.choice("01") for _ in range(5))
+        yield game_result(answers.count("1"), 5, answers, [rng.uniform(1, 15) for _ in range(5)],
+                          finished_at=1.7e9 + i)
+
+
+def per_row(path, rows):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    insert = f"INSERT INTO games ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+    started = time.perf_counter()
+    for r in rows:
+        with db:
+            db.execute(insert, tuple(r[c] for c in COLUMNS))
+    seconds = time.perf_counter() - started
+    db.close()
+    return seconds
+
+
+def batched(path, rows):
+    store = ResultsStore(path)
+    started = time.perf_counter()
+    for r in rows:
+        store.record(r)
+    queued = time.perf_counter() - started
+    store.close()
+    return queued, time.perf_counter() - started
+
+
+def leaderboard_ms(store):
+    started = time.perf_counter()
+    for _ in range(QUERIES):
+        store.leaderboard(10)
+    return (time.perf_counter() - started) / QUERIES * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = list(games(ROWS))
+        slow = per_row(os.path.join(tmp, "per_row.sqlite3"), rows)
+        queued, total = batched(os.path.join(tmp, "batched.sqlite3"), rows)
+        print(f"{ROWS:,} games")
+        print(f"commit per game: {ROWS / slow:10,.0f} games/s")
+        print(f"ResultsStore:    {ROWS / total:10,.0f} games/s written, {queued / ROWS * 1e6:.1f} µs per record()")
+
+        path = os.path.join(tmp, "leaderboard.sqlite3")
+        store = ResultsStore(path, batch_size=10_000)
+        for r in games(LEADERBOARD_ROWS, seed=1):
+            store.record(r)
+        store.close()
+        store = ResultsStore(path)
+        indexed = leaderboard_ms(store)
+        store._reader.execute("DROP INDEX games_leaderboard")
+        full_sort = leaderboard_ms(store)
+        store.close()
+        print(f"top 10 of {LEADERBOARD_ROWS:,}: {indexed:.3f} ms with the index, {full_sort:.1f} ms without")
+
+
+if __name__ == "__main__":
+    main()
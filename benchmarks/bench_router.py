@@ -0,0 +1,120 @@
+"""Router against plain round-robin, on local stand-in model servers.
+
+Three stand-ins: "steady" (0.15s), "flaky" (0.05s, 40% of calls fail)
+and "slow" (0.6s), reached through OllamaBackend, OpenAIBackend and
+OllamaBackend. Each phase sends CALLS calls through an LLMClient over
+each strategy. In phase 2 "steady" degrades to 1.5s a call, and in phase
+3 it is back to normal (the router's breakers cool down in COOLDOWN
+seconds here, rather than 30). Prints where the calls went and the
+latency callers saw.
+
+    python benchmarks/bench_router.py
+"""
+import asyncio
+import itertools
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backyard.fake_model import FakeModel  # noqa: E402
+from backyard.llm_client import LLMClient  # noqa: E402
+from backyard.providers import OllamaBackend, OpenAIBackend  # noqa: E402
+from backyard.questions import build_prompt, sample_pairs  # noqa: E402
+from backyard.router import CircuitBreaker, ModelRouter, Route  # noqa: E402
+from backyard.standin_servers import start_standin_server  # noqa: E402
+
+CALLS = 150
+CONCURRENCY = 8
+COOLDOWN = 2.0
+PHASES = (("phase 1", 0.15), ("phase 2", 1.5), ("phase 3", 0.15))
+
+
+class RoundRobin:
+    """Baseline: each call to the next backend in turn, no failover."""
+
+    name = "round-robin"
+
+    def __init__(self, backends):
+        self._next = itertools.cycle(backends)
+
+    async def generate(self, prompt):
+        return await next(self._next).generate(prompt)
+
+
+class Counting:
+    """Wraps a backend to count the calls it gets."""
+
+    def __init__(self, backend, counts):
+        self.backend = backend
+        self.name = backend.name
+        self.counts = counts
+
+    async def generate(self, prompt):
+        self.counts[self.name] += 1
+        return await self.backend.generate(prompt)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def phase(client, calls):
+    latencies, failures = [], 0
+    pairs = itertools.cycle(sample_pairs(60))
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.agenerate(build_prompt(*next(pairs)) + f" #{i}")
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies, failures
+
+
+def run(strategy, servers):
+    counts = Counter()
+    backends = [
+        Counting(OllamaBackend(servers["steady"].url, "steady", name="steady"), counts),
+        Counting(OpenAIBackend(servers["flaky"].url + "/v1", "flaky", name="flaky"), counts),
+        Counting(OllamaBackend(servers["slow"].url, "slow", name="slow"), counts),
+    ]
+    if strategy == "router":
+        routes = [Route(b, timeout=3, breaker=CircuitBreaker(cooldown=COOLDOWN)) for b in backends]
+        backend = ModelRouter(routes, slow_after=1.0)
+    else:
+        backend = RoundRobin(backends)
+    client = LLMClient(backend, max_concurrency=CONCURRENCY, timeout=5, max_retries=3, base_delay=0.05, max_delay=0.5)
+
+    for name, latency in PHASES:
+        servers["steady"].model.latency = latency
+        time.sleep(COOLDOWN)
+        counts.clear()
+        future = asyncio.run_coroutine_threadsafe(phase(client, CALLS), client._loop)
+        latencies, failures = future.result()
+        share = ", ".join(f"{b.name} {counts[b.name]}" for b in backends)
+        print(f"{strategy:12} {name}: p50 {percentile(latencies, 0.5) * 1000:5.0f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:5.0f} ms, failed {failures}/{CALLS}; backend calls: {share}")
+
+
+def main():
+    servers = {
+        "steady": start_standin_server(FakeModel(latency=0.15, seed=1)),
+        "flaky": start_standin_server(FakeModel(latency=0.05, error_rate=0.4, seed=2)),
+        "slow": start_standin_server(FakeModel(latency=0.6, seed=3)),
+    }
+    for strategy in ("round-robin", "router"):
+        run(strategy, servers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Bytes held per session, before and after the compact PlayerState.
+
+"Before" is the old session_state layout: a dict of separate keys,
+questions_asked holding full question texts, an unbounded set of seen
+keys, and a prefetcher with its own worker threads. "After" is one
+PlayerState with slots, question keys, a bounded seen list and a
+prefetcher on the shared executor. Both have played GAMES games of fresh
+LLM questions (FakeModel's, so every one is different) and hold a round
+of prefetched questions.
+
+    python benchmarks/bench_session.py
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backyard.fake_model import fake_question  # noqa: E402
+from backyard.prefetch import QuestionPrefetcher  # noqa: E402
+from backyard.questions import question_key, sample_pairs  # noqa: E402
+from backyard.session import PlayerState  # noqa: E402
+from benchmarks.sizing import deep_sizeof  # noqa: E402
+
+GAMES = 40
+QUESTIONS_PER_GAME = 5
+SESSIONS = 50
+
+
+def fetch(count):
+    return [fake_question(animal, context, next(numbers)) for animal, context in sample_pairs(count)]
+
+
+numbers = iter(range(10**9))
+
+
+def play(seen, asked, keep_text):
+    """Serve GAMES rounds of questions, recording them the way each layout does."""
+    for game in range(GAMES):
+        asked.clear()
+        for question_data in fetch(QUESTIONS_PER_GAME):
+            key = question_key(question_data["question"])
+            seen.add(key)
+            asked.add(question_data["question"] if keep_text else key)
+    return question_data
+
+
+def prefetched(prefetcher):
+    prefetcher.fill(QUESTIONS_PER_GAME)
+    prefetcher.pop()
+    return prefetcher
+
+
+def before():
+    state = {
+        "current_screen": "critter_game",
+        "score": 3,
+        "questions_asked": set(),
+        "answered": True,
+        "glass_revealed": False,
+        "total_questions": 5,
+        "current_question_data": {},
+        "question_number": 2,
+        "intro_animation_played": True,
+        "questions_seen": set(),
+        "script_runs": 300,
+        "game_script_runs": 7,
+        "last_answer": "",
+    }
+    state["current_question_data"] = play(state["questions_seen"], state["questions_asked"], keep_text=True)
+    state["last_answer"] = f"Correct! 🎉 {state['current_question_data']['additional_fact']}"
+    state["prefetcher"] = prefetched(QuestionPrefetcher(fetch, max_workers=2))
+    return state
+
+
+def after(executor):
+    state = PlayerState(screen="critter_game", score=3, answered=True, question_number=2,
+                        intro_animation_played=True, script_runs=300, game_script_runs=7)
+    state.current_question = play(state.questions_seen, state.questions_asked, keep_text=False)
+    state.last_answer = f"Correct! 🎉 {state.current_question['additional_fact']}"
+    state.prefetcher = prefetched(QuestionPrefetcher(fetch, executor=executor))
+    return state
+
+
+def measure(make):
+    threads = threading.active_count()
+    sessions = [make() for _ in range(SESSIONS)]
+    seen = set()
+    size = sum(deep_sizeof(s, seen) for s in sessions) / SESSIONS
+    return size, (threading.active_count() - threads) / SESSIONS, sessions
+
+
+def main():
+    executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="question-prefetch")
+    old_bytes, old_threads, old = measure(before)
+    new_bytes, new_threads, new = measure(lambda: after(executor))
+    print(f"{SESSIONS} sessions, {GAMES} games each")
+    print(f"before: {old_bytes:8,.0f} bytes/session, {old_threads:.2f} threads/session")
+    print(f"after:  {new_bytes:8,.0f} bytes/session, {new_threads:.2f} threads/session")
+    print(f"saved:  {1 - new_bytes / old_bytes:.0%}")
+    for s in old:
+        s["prefetcher"].cancel()
+    for s in new:
+        s.release()
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
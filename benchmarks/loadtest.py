@@ -0,0 +1,237 @@
+"""Drive many simulated players through the whole app, offline.
+
+Each player is a Streamlit AppTest session clicking through
+landing -> critter_game -> reveal_glass -> gift_card -> message_screen
+against the FakeModel backend, which can add latency, errors and
+malformed output.
+
+AppTest sets up and tears down a global runtime around every script run,
+so only one run can be in progress per process. Each worker process
+therefore interleaves --concurrency sessions, one script run at a time,
+while the LLM calls, prefetching and bank writes those runs start carry
+on in the background. The sessions in a process share the cached LLM
+client, question bank and deck, just as they do on a real server.
+--processes gives real parallelism. Latencies are script run times.
+Time spent waiting for the process's turn is reported as "queued".
+
+Reports throughput, p50/p95/p99 latency per transition and the memory
+held by each session's state. Use --max-p95 to fail the run (exit 1) when
+any transition is slower, for gating regressions.
+
+    python benchmarks/loadtest.py --players 200 --processes 4 --concurrency 25 --latency 0.5 --malformed-rate 0.2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import warnings
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sizing import deep_sizeof  # noqa: E402
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "elizabeth-gift.py")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Player:
+    """One simulated browser session."""
+
+    def __init__(self, secrets, timeout, turn):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP, default_timeout=timeout)
+        for section, values in secrets.items():
+            self.app.secrets[section] = values
+        self.turn = turn
+        self.timings = []  # (transition, seconds)
+        self.queued = []
+
+    def _step(self, transition, widget=None):
+        if widget is not None:
+            widget.click()
+        waiting = time.perf_counter()
+        with self.turn:
+            start = time.perf_counter()
+            self.app.run()
+            self.timings.append((transition, time.perf_counter() - start))
+        self.queued.append(start - waiting)
+        if self.app.exception:
+            raise RuntimeError(f"{transition}: {self.app.exception[0].message}")
+
+    def _button(self, label):
+        for button in self.app.button:
+            if button.label == label:
+                return button
+        raise RuntimeError(f"No '{label}' button on {self.app.session_state['player'].screen}: "
+                           f"{[e.value for e in self.app.error]}")
+
+    def play(self):
+        self._step("open landing")
+        self._step("landing -> critter_game", self.app.button[0])
+        while self.app.session_state["player"].screen == "critter_game":
+            choices = [b for b in self.app.button if b.key and b.key.startswith("choice_")]
+            if not choices:
+                raise RuntimeError(f"No question shown: {[e.value for e in self.app.error]}")
+            self._step("answer", random.choice(choices))
+            self._step("next fact", self._button("Next Fact"))
+        self._step("reveal gift", self._button("Reveal Your Gift"))
+        self._step("reveal_glass -> gift_card", self._button("See Your Gift"))
+        self._step("gift_card -> message_screen", self._button("A Note"))
+
+    def script_runs(self):
+        """Script executions for the whole playthrough, landing to note."""
+        return self.app.session_state["player"].script_runs
+
+    def state_bytes(self):
+        return deep_sizeof(dict(self.app.session_state.items()))
+
+
+def play_games(args, secrets, count, seed):
+    """Play `count` games in this process, `args.concurrency` at a time."""
+    random.seed(seed)
+    warnings.filterwarnings("ignore")
+    turn = threading.Lock()
+    results = []
+
+    def play(_):
+        player = Player(secrets, args.timeout, turn)
+        error = None
+        try:
+            player.play()
+        except Exception as e:
+            error = str(e)
+        with turn:
+            state_bytes = player.state_bytes()
+        return player.timings, player.queued, state_bytes, player.script_runs(), error
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results.extend(executor.map(play, range(count)))
+    return results
+
+
+def run(args):
+    secrets = {
+        "llm": {
+            "backend": "fake",
+            "fake_latency": args.latency,
+            "fake_error_rate": args.error_rate,
+            "fake_malformed_rate": args.malformed_rate,
+            "fake_tail_latency": args.tail_latency,
+            "fake_tail_rate": args.tail_rate,
+        },
+        "game": {"question_source": args.source},
+        "question_bank": {"path": "", "fresh_ratio": args.fresh_ratio},
+        # Keep simulated games off the real leaderboard
+        "results": {"path": ""},
+        "metrics": {"enabled": True},
+    }
+    shares = [args.players // args.processes + (i < args.players % args.processes)
+              for i in range(args.processes)]
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        batches = pool.starmap(play_games, [(args, secrets, share, seed + i)
+                                            for i, share in enumerate(shares) if share])
+    elapsed = time.perf_counter() - start
+
+    by_transition = defaultdict(list)
+    queued, state_sizes, script_runs, failures = [], [], [], []
+    for timings, waits, state_bytes, runs, error in (result for batch in batches for result in batch):
+        for transition, seconds in timings:
+            by_transition[transition].append(seconds)
+        queued.extend(waits)
+        state_sizes.append(state_bytes)
+        if error:
+            failures.append(error)
+        else:
+            script_runs.append(runs)
+
+    def summary(values):
+        return {
+            "count": len(values),
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+        }
+
+    completed = args.players - len(failures)
+    return {
+        "players": args.players,
+        "processes": args.processes,
+        "concurrency": args.concurrency,
+        "completed": completed,
+        "failures": len(failures),
+        "seconds": elapsed,
+        "games_per_second": completed / elapsed,
+        "transitions_per_second": sum(len(v) for v in by_transition.values()) / elapsed,
+        "session_state_bytes": statistics.mean(state_sizes) if state_sizes else 0,
+        "script_runs_per_game": statistics.mean(script_runs) if script_runs else 0,
+        "transitions": {name: summary(values) for name, values in by_transition.items()},
+        "queued": summary(queued),
+        "first_failures": failures[:5],
+    }
+
+
+def print_report(report):
+    print(f"{report['completed']}/{report['players']} games in {report['seconds']:.1f}s: "
+          f"{report['games_per_second']:.2f} games/s, {report['transitions_per_second']:.1f} transitions/s")
+    print(f"session state: {report['session_state_bytes']:,.0f} bytes/session, "
+          f"{report['script_runs_per_game']:.1f} script runs/game")
+    print(f"{'transition':30} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in report["transitions"].items():
+        print(f"{name:30} {stats['count']:6} {stats['p50'] * 1000:8.1f} {stats['p95'] * 1000:8.1f} {stats['p99'] * 1000:8.1f}")
+    queued = report["queued"]
+    print(f"{'(queued)':30} {queued['count']:6} {queued['p50'] * 1000:8.1f} {queued['p95'] * 1000:8.1f} {queued['p99'] * 1000:8.1f}")
+    for failure in report["first_failures"]:
+        print(f"failure: {failure}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test for elizabeth-gift.py")
+    parser.add_argument("--players", type=int, default=50, help="games to play in total")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--concurrency", type=int, default=10, help="games in progress at once per process")
+    parser.add_argument("--source", choices=["llm", "static", "auto"], default="llm", help="[game] question_source")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake calls failing with 429/503")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of fake responses that are malformed")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="seconds for slow fake calls")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="share of fake calls that are slow")
+    parser.add_argument("--fresh-ratio", type=float, default=0.25, help="question bank fresh_ratio")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per script run")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="also write the report here")
+    parser.add_argument("--max-p95", type=float, help="exit 1 if any transition's p95 exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    too_slow = [name for name, stats in report["transitions"].items()
+                if args.max_p95 is not None and stats["p95"] > args.max_p95]
+    if report["failures"] or too_slow:
+        if too_slow:
+            print(f"p95 above {args.max_p95}s: {', '.join(too_slow)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""Rough deep memory size of Python objects, for the benchmark scripts."""
+import sys
+import threading
+from concurrent.futures import Executor
+
+# Shared, process-wide things a session only points at
+_SKIP = (type, threading.Thread, Executor, type(sys))
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes used by `obj` and everything it references, each object counted once."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, _SKIP):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        if hasattr(obj, "__dict__"):
+            size += deep_sizeof(vars(obj), seen)
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), seen)
+    return size
@@ -1,122 +1,419 @@
-import toml
 import streamlit as st
-import random
-import time
-import google.generativeai as genai
+import atexit
+import os
 import re
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+from backyard import metrics
+from backyard.fake_model import FakeModel
+from backyard.llm_client import LLMClient, ModelBackend
+from backyard.prefetch import QuestionPrefetcher
+from backyard.providers import OllamaBackend, OpenAIBackend
+from backyard.question_bank import QuestionBank
+from backyard.response_cache import ResponseCache
+from backyard.results import ResultsStore, game_result
+from backyard.router import CircuitBreaker, ModelRouter, Route
+from backyard.static_deck import StaticDeck
+from backyard.theme import THEMES, stylesheet
+from backyard.questions import QuestionGenerationError, build_prompt, question_key, request_questions
+from backyard.session import PlayerState, SessionRegistry
+from backyard.streaming import PartialQuestionParser
 
 # --- Configuration ---
-THEME = {
-    "background_color": "#f70696",
-    "text_color": "#ffffff",
-    "button_text_color": "#333333",
-    "button_color": "#ffffff",
-    "button_hover_color": "#f0f0f0",
-    "accent_color": "#ffffff",
-    "font_family": "serif",
-    "padding": "30px",
-    "border_color": "#ffffff"
-}
+# Default data files live next to this script, wherever it is run from
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Themes live in backyard/theme.py; [game] theme in secrets picks one
+DEFAULT_THEME = "christmas"
 
-# --- Animal and Context Data ---
-ANIMALS = ["squirrel", "raccoon", "possum", "cardinal", "nuthatches", "blue jay", "deer", "butterfly", "hummingbird", "chipmunk"]
-CONTEXTS = ["diet", "habitat", "behavior", "lifespan", "unique abilities", "communication"]
+# How many upcoming questions to generate in the background, and to ask
+# the LLM for in a single call. 5 covers a whole round in one request.
+QUESTION_BATCH_SIZE = 5
+# Prefetch threads shared by all sessions; [llm] max_concurrency still
+# caps how many LLM calls are in flight
+PREFETCH_WORKERS = 16
 
 # --- Session State Initialization ---
-# Using a dictionary for easier management
-SESSION_KEYS = {
-    "current_screen": 'landing',
-    "score": 0,
-    "questions_asked": set(),
-    "answered": False,
-    "glass_revealed": False,
-    "total_questions": 5,
-    "current_question_data": {},
-    "llm_initialized": False,
-    "question_number": 0,
-    "intro_animation_played": False,
-}
+# One compact record per session (backyard/session.py), under a single key
+if "player" not in st.session_state:
+    st.session_state.player = PlayerState()
+
 
-# Initialize session state variables using a loop
-for key, default_value in SESSION_KEYS.items():
-    if key not in st.session_state:
-        st.session_state[key] = default_value
+def player_state():
+    """This session's PlayerState."""
+    return st.session_state.player
+
+
+def secrets_section(name):
+    """Return an optional section of the Streamlit secrets as a dict, or {} if absent."""
+    try:
+        return dict(st.secrets.get(name, {}))
+    except Exception:
+        return {}
 
 
 def load_api_key():
-    """Loads the API key from Streamlit Cloud secrets or environment."""
+    """Loads the API key from Streamlit Cloud secrets, raising ValueError if it is missing."""
     try:
         api_key = st.secrets["google"]["api_key"]
-        if api_key:
-          return api_key
-        else:
-          st.error("API key not found in Streamlit secrets. Please ensure it has been configured.")
-          return None
     except KeyError:
-       st.error("API key not found in Streamlit secrets. Please ensure it has been configured under google/api_key.")
-       return None
+        raise ValueError("API key not found in Streamlit secrets. Please ensure it has been configured under google/api_key.")
     except Exception as e:
-      st.error(f"An error occurred during API key load: {e}")
-      return None
-
-# Initialize Gemini and add to session state
-def initialize_gemini():
-    api_key = load_api_key()
-    if api_key:
-        genai.configure(api_key=api_key)
-        st.session_state.model = genai.GenerativeModel("gemini-1.5-flash")
-        st.session_state.llm_initialized = True
-    else:
-      return None
-
-# Randomly select an animal
-def select_random_animal():
-    return random.choice(ANIMALS)
+        raise ValueError(f"An error occurred during API key load: {e}")
+    if not api_key:
+        raise ValueError("API key not found in Streamlit secrets. Please ensure it has been configured.")
+    return api_key
+
+def make_backend(config):
+    """The model backend described by an [llm] or [[llm.routes]] table in secrets.
+
+    `backend` picks it: "gemini" (the default), "openai" for any
+    OpenAI-compatible server such as llama.cpp's, "ollama", "fake" for the
+    offline FakeModel, or "router" to spread calls over the [[llm.routes]]
+    tables by latency and error rate, with circuit breakers.
+    """
+    kind = config.get("backend", "gemini")
+    if kind == "fake":
+        # Offline stand-in for load tests and local development
+        return ModelBackend(FakeModel(
+            latency=float(config.get("fake_latency", 0)),
+            error_rate=float(config.get("fake_error_rate", 0)),
+            malformed_rate=float(config.get("fake_malformed_rate", 0)),
+            tail_latency=float(config.get("fake_tail_latency", 0)),
+            tail_rate=float(config.get("fake_tail_rate", 0)),
+        ), name=config.get("name"))
+    if kind in ("openai", "ollama"):
+        backend_class = OpenAIBackend if kind == "openai" else OllamaBackend
+        default_url = "http://localhost:8080/v1" if kind == "openai" else "http://localhost:11434"
+        return backend_class(
+            config.get("url", default_url), config.get("model", ""),
+            timeout=float(config.get("timeout", 60)), api_key=config.get("api_key"), name=config.get("name"),
+        )
+    if kind == "router":
+        routes = [
+            Route(
+                make_backend(dict(route)),
+                timeout=float(route["timeout"]) if route.get("timeout") else None,
+                weight=float(route.get("weight", 1.0)),
+                breaker=CircuitBreaker(int(config.get("failure_threshold", 3)), float(config.get("cooldown", 30))),
+            )
+            for route in config.get("routes", [])
+        ]
+        return ModelRouter(routes, slow_after=float(config["slow_after"]) if config.get("slow_after") else None)
+    # Imported here: the gRPC/protobuf stack behind it takes most of a
+    # second to load, and only the game screen needs it
+    import google.generativeai as genai
+    genai.configure(api_key=load_api_key())
+    return ModelBackend(genai.GenerativeModel(config.get("model", "gemini-1.5-flash")), name=config.get("name"))
+
+@st.cache_resource(show_spinner=False)
+def get_llm_client():
+    """One LLM client for the whole process, configured under [llm] in secrets.
+
+    The backend comes from make_backend. Built on first use by whichever
+    session gets there first; failures are not cached, so a missing key is
+    retried on the next rerun. A rebuilt client keeps the response cache.
+    """
+    config = secrets_section("llm")
+    with metrics.registry.timer("llm_client_init_seconds"):
+        backend = make_backend(config)
+    client = LLMClient(
+        backend,
+        max_concurrency=int(config.get("max_concurrency", 8)),
+        timeout=float(config.get("timeout", 30)),
+        max_retries=int(config.get("max_retries", 3)),
+        hedge_after=float(config["hedge_after"]) if config.get("hedge_after") else None,
+        cache=get_response_cache(),
+    )
+    if isinstance(backend, ModelRouter):
+        metrics.registry.set_collector("llm_routes", lambda: route_gauges(backend))
+    return client
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """Responses shared by identical prompts, kept when the LLM client is rebuilt."""
+    config = secrets_section("llm")
+    cache = ResponseCache(
+        ttl_seconds=float(config.get("cache_ttl", 60)),
+        max_entries=int(config.get("cache_size", 256)),
+    )
+    metrics.registry.set_collector("response_cache", lambda: {f"response_cache_{k}": v for k, v in cache.stats().items()})
+    return cache
+
+def route_gauges(router):
+    """Per-backend router state as flat gauges, e.g. llm_route_ollama_llama3_2_latency_seconds."""
+    gauges = {}
+    for name, stats in router.stats().items():
+        prefix = "llm_route_" + re.sub(r"\W+", "_", name).strip("_")
+        gauges[f"{prefix}_open"] = int(stats["state"] == "open")
+        gauges[f"{prefix}_latency_seconds"] = stats["latency"]
+        gauges[f"{prefix}_error_rate"] = stats["error_rate"]
+        gauges[f"{prefix}_calls"] = stats["calls"]
+    return gauges
+
+def shared_llm_client(quiet=False):
+    """Return the shared LLM client, rebuilding it if it has gone unhealthy.
+
+    Shows an error (unless `quiet`) and returns None if the client cannot be built.
+    """
+    try:
+        client = get_llm_client()
+        if not client.healthy():
+            get_llm_client.clear()
+            client = get_llm_client()
+        return client
+    except Exception as e:
+        if not quiet:
+            st.error(str(e))
+        return None
+
+def current_theme():
+    """The theme named by [game] theme in secrets, falling back to the default."""
+    return THEMES.get(secrets_section("game").get("theme"), THEMES[DEFAULT_THEME])
+
+def question_source():
+    """Where questions come from, set by [game] question_source in secrets.
+
+    "llm" always asks the model, "static" only serves the bundled deck, and
+    "auto" (the default) uses the model with the deck as a fallback.
+    """
+    return secrets_section("game").get("question_source", "auto")
+
+def fallback_after():
+    """Seconds "auto" waits on the model for a question before serving the deck, from [game] fallback_after."""
+    return float(secrets_section("game").get("fallback_after", 2.0))
+
+@st.cache_resource
+def get_static_deck():
+    """The bundled question deck, or None if the file is missing."""
+    path = secrets_section("game").get("deck", os.path.join(APP_DIR, "decks", "backyard.deck"))
+    if not os.path.exists(path):
+        return None
+    return StaticDeck(path)
+
+def deck_question_data():
+    """Draw a question from the static deck, preferring ones this session hasn't seen."""
+    deck = get_static_deck()
+    if deck is None:
+        return None
+    state = player_state()
+    animal, context = state.pairs.draw(1)[0]
+    return (
+        deck.get(animal, context, state.questions_seen)
+        or deck.draw(state.questions_seen)
+        # The session has been through the whole deck: repeat one, just not from this game
+        or deck.draw(state.questions_asked)
+        or deck.draw()
+    )
 
-# Randomly select a context
-def select_random_context():
-    return random.choice(CONTEXTS)
+@st.cache_resource(show_spinner=False)
+def get_question_bank():
+    """Question bank shared by every session, configured under [question_bank] in secrets."""
+    config = secrets_section("question_bank")
+    bank = QuestionBank(
+        path=config.get("path", os.path.join(APP_DIR, ".question_bank.sqlite3")),
+        max_questions=int(config.get("max_questions", 600)),
+        max_per_pair=int(config.get("max_per_pair", 20)),
+        ttl_seconds=float(config.get("ttl_hours", 24 * 30)) * 3600,
+        fresh_ratio=float(config.get("fresh_ratio", 0.25)),
+    )
+    # Questions built ahead of time with pregenerate_questions.py
+    bundle = config.get("bundle", os.path.join(APP_DIR, "question_bundle.json.gz"))
+    if bundle and os.path.exists(bundle):
+        bank.load_bundle(bundle)
+    # Writes when questions were last served, which it otherwise batches
+    atexit.register(bank.close)
+    metrics.registry.set_collector("question_bank", lambda: {f"question_bank_{k}": v for k, v in bank.stats().items()})
+    return bank
 
 def generate_question_data(model):
     """Generates a question, options, correct answer, and additional fact using an LLM."""
     try:
-        animal = select_random_animal()
-        context = select_random_context()
-        prompt = f"""Generate a question about a {animal}'s {context}.
-        Provide 3 multiple choice options, and indicate the single correct answer. The format should be a JSON object with keys for "question", "options" (which is an array), "correct_answer", and "additional_fact". Do not include a title.
-
-        Here is an example of the format you should use:
-        {{
-            "question": "What do I do with the acorns that I bury?",
-            "options": ["Leave them be", "Remember their location for later", "Forget where I buried them"],
-            "correct_answer": "Forget where I buried them",
-            "additional_fact": "That helps plant thousands of trees!"
-        }}
-        """
-        response = model.generate_content(prompt)
-        if not response or not response.text:
-            st.error("LLM returned an empty response.")
-            return None
-
-        question_data = response.text.strip()
-
-        # Remove markdown code block if present
-        match = re.match(r'```(?:json)?\s*(.*?)\s*```', question_data, re.DOTALL)
-        if match:
-             question_data = match.group(1).strip()
-
-        try:
-          return json.loads(question_data)
-        except json.JSONDecodeError as e:
-           st.error(f"JSON decode error: {e}")
-           st.error(f"LLM output: {question_data}")
-           return None
-
+        state = player_state()
+        # request_questions drops questions this session has already had;
+        # a fresh pair means a different prompt, so try once more
+        for _ in range(2):
+            questions = request_questions(model, 1, get_question_bank(), state.questions_seen, state.pairs)
+            if questions:
+                return questions[0]
+        st.error("Only got questions you've already had. Please try again!")
+        return None
+    except QuestionGenerationError as e:
+        st.error(str(e))
+        return None
     except Exception as e:
        st.error(f"Error during LLM call: {e}")
        return None
 
+@st.cache_resource(show_spinner=False)
+def get_results_store():
+    """Finished games from every session, configured under [results] in secrets; None if disabled."""
+    config = secrets_section("results")
+    path = config.get("path", os.path.join(APP_DIR, ".results.sqlite3"))
+    if not path:
+        return None
+    store = ResultsStore(
+        path,
+        batch_size=int(config.get("batch_size", 100)),
+        flush_interval=float(config.get("flush_interval", 1.0)),
+    )
+    # Games still queued when the server stops would otherwise be lost
+    atexit.register(store.close)
+    metrics.registry.set_collector("results", lambda: {f"results_{k}": v for k, v in store.stats().items()})
+    return store
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor():
+    """Worker threads for every session's prefetcher, so idle sessions hold none of their own."""
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="question-prefetch")
+
+@st.cache_resource
+def get_session_registry():
+    """Live sessions, configured under [session] in secrets."""
+    config = secrets_section("session")
+    registry = SessionRegistry(idle_seconds=float(config.get("idle_minutes", 15)) * 60)
+    metrics.registry.set_collector("sessions", lambda: {f"sessions_{k}": v for k, v in registry.stats().items()})
+    return registry
+
+def get_prefetcher(model):
+    """Return this session's question prefetcher, creating it on first use.
+
+    Each fetch asks for the shared client again, so it follows a rebuild;
+    `model` is only the fallback if that fails.
+    """
+    state = player_state()
+    if state.prefetcher is None:
+        bank = get_question_bank()
+        seen, pairs = state.questions_seen, state.pairs
+        state.prefetcher = QuestionPrefetcher(
+            lambda count: request_questions(shared_llm_client(quiet=True) or model, count, bank, seen, pairs),
+            executor=get_prefetch_executor(),
+        )
+    return state.prefetcher
+
+def stream_question_data(model, wait=None):
+    """Generate one question, showing the question and then the options as they stream in.
+
+    Falls back to the whole-response path if the model can't stream or the
+    stream breaks part way. With `wait`, the deck is standing by instead:
+    the stream must start within `wait` seconds, and if it fails this
+    returns None without trying again or showing an error.
+    """
+    state = player_state()
+    animal, context = state.pairs.draw(1)[0]
+    bank = get_question_bank()
+    seen = state.questions_seen
+    if not bank.wants_fresh():
+        cached = bank.take(animal, context, seen)
+        if cached is not None:
+            return cached
+
+    question_data = None
+    if hasattr(model, "stream"):
+        question_box = st.empty()
+        options_box = st.empty()
+        question_box.markdown("<p class='small-text'>Fetching new question...</p>", unsafe_allow_html=True)
+        parser = PartialQuestionParser()
+        try:
+            for chunk in model.stream(build_prompt(animal, context), first_chunk_within=wait):
+                partial = parser.feed(chunk)
+                if partial.question:
+                    question_box.markdown(
+                        f"<div class='message-box'><p class='small-text' style='font-size: 1.3em;'>{partial.question}</p></div>",
+                        unsafe_allow_html=True
+                    )
+                if partial.options:
+                    options_box.markdown(
+                        "<div class='option-button-row'>"
+                        + "".join(f"<p class='small-text'>{option}</p>" for option in partial.options)
+                        + "</div>",
+                        unsafe_allow_html=True
+                    )
+            question_data = parser.result()
+            if question_key(question_data["question"]) in seen:
+                # A repeat for this session; ask again the ordinary way
+                question_data = None
+        except Exception:
+            question_data = None
+        finally:
+            question_box.empty()
+            options_box.empty()
+
+    if question_data is None:
+        if wait is not None:
+            return None
+        with st.spinner('Fetching new question...'):
+            return generate_question_data(model)
+    question_data.update(animal=animal, context=context)
+    bank.add(animal, context, question_data, seen)
+    return question_data
+
+def next_question_data(model, wait=None):
+    """Take the next question from the prefetch queue, or stream a new one if it is empty.
+
+    With `wait` (seconds), the deck covers for the model: returns None
+    rather than wait longer than that on the queue or the stream, or
+    stream at all once the model has just failed.
+    """
+    state = player_state()
+    prefetcher = get_prefetcher(model)
+    question_data = None
+    if len(prefetcher):
+        with st.spinner('Fetching new question...'):
+            question_data = prefetcher.pop(timeout=wait)
+            # Skip anything this game has already asked
+            while question_data is not None and question_key(question_data["question"]) in state.questions_asked:
+                question_data = prefetcher.pop(timeout=wait)
+    if question_data is None and wait is not None and (len(prefetcher) or model.failing()):
+        # The round is still on its way, or the model just failed
+        return None
+    if question_data is None:
+        # Get the questions after this one going while this one streams in
+        remaining = state.total_questions - state.question_number - 1
+        prefetcher.fill(min(QUESTION_BATCH_SIZE, remaining))
+        question_data = stream_question_data(model, wait)
+    return question_data
+
+def prefetch_upcoming_questions(model):
+    """Keep the questions still to come in this game generating in the background."""
+    state = player_state()
+    remaining = state.total_questions - state.question_number
+    get_prefetcher(model).fill(min(QUESTION_BATCH_SIZE, remaining))
+
+def prefetch_first_round():
+    """Build the LLM client and start the opening round generating."""
+    model = shared_llm_client(quiet=True)
+    if model is not None:
+        prefetch_upcoming_questions(model)
+
+def warm_up():
+    """Run prefetch_first_round on a background thread so the landing screen paints without waiting for it."""
+    state = player_state()
+    if question_source() == "static" or state.prefetcher is not None:
+        return
+    if state.warm_up_thread is not None and state.warm_up_thread.is_alive():
+        return
+    thread = threading.Thread(target=prefetch_first_round, name="warm-up", daemon=True)
+    add_script_run_ctx(thread)
+    state.warm_up_thread = thread
+    thread.start()
+
+def finish_warm_up():
+    """Wait for the landing screen's warm-up, so the game doesn't start a second prefetcher and round beside it."""
+    state = player_state()
+    if state.warm_up_thread is not None:
+        state.warm_up_thread.join()
+        state.warm_up_thread = None
+
+def answer_feedback(question_data):
+    """The (wrong, right) lines shown after an answer, so answering only has to pick one."""
+    return (
+        f"Not quite! The correct answer was {question_data['correct_answer']}! 🎓 {question_data['additional_fact']}",
+        f"Correct! 🎉 {question_data['additional_fact']}",
+    )
+
 st.set_page_config(
     page_title="A Gift for Elizabeth",
     initial_sidebar_state="collapsed",
@@ -124,149 +421,109 @@ st.set_page_config(
 
 def apply_custom_css():
     """Apply custom CSS styling to the application."""
-    st.markdown(
-        f"""
-        <style>
-        body {{
-            background-color: {THEME["background_color"]};
-            color: {THEME["text_color"]};
-            font-family: {THEME["font_family"]};
-            margin: 0;
-        }}
-        .stApp {{
-            max-width: 100%;
-            padding: {THEME["padding"]};
-            margin: 0;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-        }}
-         .title-text {{
-            color: {THEME["accent_color"]};
-            font-size: 2.8em;
-            text-align: center;
-            padding-bottom: 15px;
-            line-height: 1.2;
-            font-weight: bold;
-            animation: fadeIn 1.2s ease-out;
-        }}
-        .small-text {{
-            color: {THEME["text_color"]};
-            font-size: 1.1em;
-            text-align: center;
-            padding-bottom: 25px;
-            line-height: 1.4;
-            animation: fadeIn 1.2s ease-out;
-        }}
-         .score-text {{
-            color: {THEME["text_color"]};
-            font-size: 1.4em;
-            text-align: center;
-            padding-bottom: 15px;
-             font-weight: bold;
-        }}
-        .gift-card {{
-            background-color: transparent;
-            text-align: center;
-            padding: 20px;
-            margin: 20px auto;
-            max-width: 700px;
-            border-radius: 10px;
-            border: 1px solid {THEME["border_color"]};
-            animation: fadeIn 1.2s ease-out;
-        }}
-        .button-container {{
-            text-align: center;
-            margin: 20px auto;
-            max-width: 400px;
-            animation: fadeIn 1.2s ease-out;
-        }}
-       .stButton>button {{
-            background-color: {THEME["button_color"]};
-            color: {THEME["button_text_color"]};
-            padding: 12px 25px;
-            border-radius: 8px;
-            border: none;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            font-size: 1.1em;
-            min-width: 175px;
-            width: 100%;
-            margin-bottom: 10px;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-        }}
-        .stButton>button:hover {{
-            background-color: {THEME["button_hover_color"]};
-            transform: translateY(-3px);
-            box-shadow: 0 4px 10px rgba(0,0,0,0.3);
-        }}
-        .message-box {{
-            background-color: transparent;
-            padding: 25px;
-            margin: 25px auto;
-            text-align: center;
-            line-height: 1.7;
-            max-width: 900px;
-            border-radius: 10px;
-            border: 1px solid {THEME["border_color"]};
-            animation: fadeIn 1.2s ease-out;
-        }}
-        .image-container {{
-            text-align: center;
-            padding: 25px;
-            margin: 15px auto;
-            max-width: 700px;
-            animation: fadeIn 1.2s ease-out;
-        }}
-        .info-container {{
-            background-color: transparent;
-            padding: 20px;
-            margin: 20px auto;
-            text-align: center;
-            line-height: 1.6;
-            max-width: 900px;
-            border-radius: 10px;
-            border: 1px solid {THEME["border_color"]};
-             animation: fadeIn 1.2s ease-out;
-        }}
-          .option-button-row {{
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            margin: 10px auto; /* Added margin for spacing */
-            max-width: 400px;
-        }}
-        a {{
-            color: {THEME["accent_color"]};
-            text-decoration: none;
-            transition: all 0.3s ease;
-        }}
-        a:hover {{
-            text-decoration: underline;
-            opacity: 0.8;
-        }}
-        @keyframes fadeIn {{
-            from {{ opacity: 0; }}
-            to {{ opacity: 1; }}
-        }}
-        @keyframes slideInFromBottom {{
-            from {{transform: translateY(100px); opacity: 0;}}
-            to {{ transform: translateY(0); opacity: 1; }}
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    with metrics.registry.timer("css_seconds"):
+        st.markdown(stylesheet(current_theme()), unsafe_allow_html=True)
 
 def reset_game_state():
     """Reset game state variables."""
-    st.session_state.score = 0
-    st.session_state.questions_asked = set()
-    st.session_state.answered = False
-    if 'current_question_data' in st.session_state:
-        del st.session_state.current_question_data
-    st.session_state.question_number = 0
-    st.session_state.intro_animation_played = False
+    player_state().new_game()
+
+
+# --- Screen State Machine ---
+# Buttons change state in on_click callbacks, which Streamlit runs before
+# the rerun the click already triggers, so every click costs exactly one
+# script execution instead of two.
+TRANSITIONS = {
+    'landing': {'critter_game'},
+    'critter_game': {'critter_game', 'reveal_glass'},
+    'reveal_glass': {'gift_card'},
+    'gift_card': {'message_screen'},
+    'message_screen': set(),
+}
+
+def go_to(screen):
+    """Move to `screen`; the current screen not allowing it is a bug."""
+    state = player_state()
+    if screen not in TRANSITIONS.get(state.screen, set()):
+        raise ValueError(f"Can't go from {state.screen} to {screen}")
+    state.screen = screen
+
+def on_screen(screen):
+    """Whether a callback's button still belongs to the current screen.
+
+    A second click can land before the rerun that replaces the button, so
+    callbacks ignore clicks from a screen the player has already left.
+    """
+    return player_state().screen == screen
+
+def see_gift():
+    """Callback for "See Your Gift"."""
+    if on_screen('reveal_glass'):
+        go_to('gift_card')
+
+def read_note():
+    """Callback for "A Note"."""
+    if on_screen('gift_card'):
+        go_to('message_screen')
+
+def start_game():
+    """Callback for the landing screen buttons."""
+    if not on_screen('landing'):
+        return
+    state = player_state()
+    # A fresh session keeps the round prefetched on the landing screen
+    if state.question_number:
+        reset_game_state()
+    state.intro_animation_played = True
+    state.game_script_runs = 0
+    go_to('critter_game')
+
+def answer_question(choice):
+    """Callback for an answer button: score it and pick the feedback line."""
+    state = player_state()
+    question_data = state.current_question
+    if not on_screen('critter_game') or state.answered or question_data is None:
+        return
+    correct = question_data["options"][choice] == question_data["correct_answer"]
+    state.answered = True
+    state.score += correct
+    state.last_answer = (state.feedback or answer_feedback(question_data))[correct]
+    state.answers += "1" if correct else "0"
+    state.answer_seconds.append(time.monotonic() - state.shown_at)
+
+def next_fact():
+    """Callback for "Next Fact": on to the next question, or the reveal once the game is over."""
+    state = player_state()
+    if not on_screen('critter_game') or not state.answered:
+        return
+    if state.question_number >= state.total_questions:
+        record_game()
+        go_to('reveal_glass')
+    else:
+        state.current_question = None
+        state.answered = False
+
+def restart_game():
+    """Callback for "Restart Game"."""
+    if not on_screen('critter_game'):
+        return
+    reset_game_state()
+    go_to('critter_game')
+
+def reveal_gift():
+    """Callback for "Reveal Your Gift"."""
+    if on_screen('reveal_glass'):
+        player_state().glass_revealed = True
+
+def record_game():
+    """Count the finished game's script runs and queue it for the leaderboard."""
+    # Their ratio is script runs per game, start to last answer
+    metrics.registry.inc("games_finished_total")
+    metrics.registry.inc("game_script_runs_total", player_state().game_script_runs)
+    store = get_results_store()
+    if store is not None:
+        state = player_state()
+        store.record(game_result(state.score, state.total_questions, state.answers, state.answer_seconds))
 
 
 def display_landing_screen():
@@ -276,25 +533,19 @@ def display_landing_screen():
         unsafe_allow_html=True
     )
 
+    warm_up()
+
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-      if st.session_state.intro_animation_played == False:
+      if player_state().intro_animation_played == False:
           st.markdown("Would you like to play a fun game to learn more about our backyard friends?", unsafe_allow_html=True)
-          if st.button("Click this button to start!", use_container_width=True):
-            with st.spinner("Let's Get Started..."):
-              time.sleep(1)
-              st.session_state.intro_animation_played = True
-              reset_game_state()
-              st.session_state.current_screen = 'critter_game'
-              st.rerun()
+          st.button("Click this button to start!", use_container_width=True, on_click=start_game)
       else:
-        if st.button("Begin Your Morning Adventure!", use_container_width=True):
-            reset_game_state()
-            st.session_state.current_screen = 'critter_game'
-            st.rerun()
+        st.button("Begin Your Morning Adventure!", use_container_width=True, on_click=start_game)
 
 def display_critter_game():
     """Display the critter game screen with facts and interactions."""
+    state = player_state()
     st.markdown("<h1 class='title-text' style='animation: slideInFromBottom 0.8s ease-out;'>Backyard Friends</h1>", unsafe_allow_html=True)
     st.markdown(
         "<p class='small-text' style='animation: slideInFromBottom 0.8s ease-out;'>Let's learn some fun facts about our backyard friends! Each correct guess adds a point!</p>",
@@ -303,105 +554,123 @@ def display_critter_game():
 
     # Display score and question count
     st.markdown(
-        f"<p class='score-text' style='animation: slideInFromBottom 0.8s ease-out;'>Score: {st.session_state.score} | Questions Remaining: {st.session_state.total_questions - st.session_state.question_number}</p>",
+        f"<p class='score-text' style='animation: slideInFromBottom 0.8s ease-out;'>Score: {state.score} | Questions Remaining: {state.total_questions - state.question_number}</p>",
         unsafe_allow_html=True
     )
 
     try:
-         # Initialize LLM if not already done
-        if not st.session_state.llm_initialized:
-             initialize_gemini()
+        finish_warm_up()
+        source = question_source()
+        # In "auto" the deck covers for the model, so its failures stay quiet and short
+        covered = source == "auto" and get_static_deck() is not None
+        model = None
+        if source != "static":
+            # Shared by every session; built by whoever needs it first
+            model = shared_llm_client(quiet=covered)
+            if covered and model is not None and model.failing():
+                # Its latest call failed moments ago; give it a rest
+                model = None
 
         # Generate a question if none is current
-        if not st.session_state.current_question_data and st.session_state.llm_initialized:
-            with st.spinner('Fetching new question...'):
-                question_data = generate_question_data(st.session_state.model)
-                if question_data:
-                    st.session_state.current_question_data = question_data
-                    st.session_state.question_number += 1
-                else:
-                    st.error("Failed to generate question, please try again!")
-                    return
-
-        if 'question' in st.session_state.current_question_data:
+        if not state.current_question:
+            question_data = None
+            if model is not None:
+                question_data = next_question_data(model, fallback_after() if covered else None)
+            if question_data is None and source != "llm":
+                # No model, or it is struggling: serve from the deck instead
+                question_data = deck_question_data()
+            if question_data:
+                state.current_question = question_data
+                state.feedback = answer_feedback(question_data)
+                state.shown_at = time.monotonic()
+                state.questions_asked.add(question_key(question_data["question"]))
+                state.question_number += 1
+            else:
+                metrics.registry.inc("errors_total", screen="critter_game")
+                st.error("Failed to generate question, please try again!")
+                return
+
+        # Start on the following questions while the player reads this one
+        if model is not None:
+            prefetch_upcoming_questions(model)
+
+        if 'question' in state.current_question:
              # Display the current fact
             st.markdown(
-                f"<div class='message-box' style='animation: slideInFromBottom 0.8s ease-out;'><p class='small-text' style='font-size: 1.3em;'>{st.session_state.current_question_data['question']}</p></div>",
+                f"<div class='message-box' style='animation: slideInFromBottom 0.8s ease-out;'><p class='small-text' style='font-size: 1.3em;'>{state.current_question['question']}</p></div>",
                 unsafe_allow_html=True
             )
             # Create buttons for animal choices
-            if not st.session_state.answered:
+            if not state.answered:
                
                 with st.container():
                     st.markdown("<div class='option-button-row'>", unsafe_allow_html=True)
-                    for i, option in enumerate(st.session_state.current_question_data["options"]):
-                        if st.button(option, key=f"choice_{i}", use_container_width=True):
-                                st.session_state.answered = True
-                                if st.session_state.current_question_data["options"][i] == st.session_state.current_question_data["correct_answer"]:
-                                     st.session_state.score += 1
-                                     st.session_state.last_answer = f"Correct! 🎉 {st.session_state.current_question_data['additional_fact']}"
-                                else:
-                                     st.session_state.last_answer = f"Not quite! The correct answer was {st.session_state.current_question_data['correct_answer']}! 🎓 {st.session_state.current_question_data['additional_fact']}"
-                                st.session_state.questions_asked.add(st.session_state.current_question_data["question"])
-                                st.rerun()
+                    for i, option in enumerate(state.current_question["options"]):
+                        st.button(option, key=f"choice_{i}", use_container_width=True, on_click=answer_question, args=(i,))
                     st.markdown("</div>", unsafe_allow_html=True)
                 
 
         # Show answer response
-        if st.session_state.answered:
+        if state.answered:
              st.markdown(
-                 f"<p class='small-text' style='font-size: 1.3em; animation: slideInFromBottom 0.8s ease-out;'>{st.session_state.last_answer}</p>",
+                 f"<p class='small-text' style='font-size: 1.3em; animation: slideInFromBottom 0.8s ease-out;'>{state.last_answer}</p>",
                  unsafe_allow_html=True
              )
              col1, col2, col3 = st.columns([1, 2, 1])
              with col2:
-                 if st.button("Next Fact", use_container_width=True):
-                     if st.session_state.question_number >= st.session_state.total_questions:
-                         st.session_state.current_screen = 'reveal_glass'
-                         st.rerun()
-                     else:
-                        if 'current_question_data' in st.session_state:
-                            del st.session_state.current_question_data
-                        st.session_state.answered = False
-                        st.rerun()
-        
+                 st.button("Next Fact", use_container_width=True, on_click=next_fact)
+
              with col3:
-               if st.button("Restart Game", use_container_width=True):
-                  reset_game_state()
-                  st.session_state.current_screen = 'critter_game'
-                  st.rerun()
+               st.button("Restart Game", use_container_width=True, on_click=restart_game)
 
     except Exception as e:
+        metrics.registry.inc("errors_total", screen="critter_game")
         st.error(f"Something went wrong in the game. Let's start over! Error: {e}")
         reset_game_state()
         st.rerun()
 
 def display_reveal_glass():
     """Display the glass reveal screen with animation effect."""
+    state = player_state()
     st.markdown("<h1 class='title-text' style='animation: slideInFromBottom 0.8s ease-out;'>A Special Morning Gift</h1>", unsafe_allow_html=True)
     st.markdown(
-        f"<p class='small-text' style='animation: slideInFromBottom 0.8s ease-out;'>You did great! Final Score: {st.session_state.score}/{st.session_state.total_questions}</p>",
+        f"<p class='small-text' style='animation: slideInFromBottom 0.8s ease-out;'>You did great! Final Score: {state.score}/{state.total_questions}</p>",
         unsafe_allow_html=True
     )
+    display_leaderboard()
 
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if not st.session_state.glass_revealed:
+        if not state.glass_revealed:
             st.markdown(
                 "<div class='image-container'><p class='small-text' style='animation: slideInFromBottom 0.8s ease-out;'>Now for your surprise... tap to reveal!</p></div>",
                 unsafe_allow_html=True
             )
-            if st.button("Reveal Your Gift", use_container_width=True):
-                st.session_state.glass_revealed = True
-                st.rerun()
+            st.button("Reveal Your Gift", use_container_width=True, on_click=reveal_gift)
         else:
             st.markdown(
                 "<div class='image-container'><p class='small-text' style='animation: slideInFromBottom 0.8s ease-out;'>Your gift awaits...</p></div>",
                 unsafe_allow_html=True
             )
-            if st.button("See Your Gift", use_container_width=True):
-                st.session_state.current_screen = 'gift_card'
-                st.rerun()
+            st.button("See Your Gift", use_container_width=True, on_click=see_gift)
+
+def display_leaderboard():
+    """Best games across every player: highest score, then quickest answers."""
+    store = get_results_store()
+    if store is None:
+        return
+    games = store.leaderboard(int(secrets_section("results").get("leaderboard_size", 5)))
+    if not games:
+        return
+    rows = "".join(
+        f"<p class='small-text'>{rank}. {game['score']}/{game['total']} in {game['seconds']:.1f}s"
+        f" · {time.strftime('%b %d', time.localtime(game['finished_at']))}</p>"
+        for rank, game in enumerate(games, start=1)
+    )
+    st.markdown(
+        f"<div class='message-box' style='animation: slideInFromBottom 0.8s ease-out;'><p class='small-text'><b>🏆 Best Games</b></p>{rows}</div>",
+        unsafe_allow_html=True
+    )
 
 def display_gift_card():
     """Display the gift card screen with workshop details."""
@@ -448,9 +717,7 @@ def display_gift_card():
                 unsafe_allow_html=True
             )
 
-        if st.button("A Note", use_container_width=True):
-            st.session_state.current_screen = 'message_screen'
-            st.rerun()
+        st.button("A Note", use_container_width=True, on_click=read_note)
 
 def display_message_screen():
     """Display the final message screen with personal Christmas note."""
@@ -484,30 +751,52 @@ def display_message_screen():
     )
     
     
+@st.cache_resource
+def setup_metrics():
+    """Turn on metrics once per process if [metrics] enabled is set in secrets.
+
+    Exported as Prometheus text on `port` and/or appended to `jsonl_path`
+    every `interval` seconds.
+    """
+    config = secrets_section("metrics")
+    if not config.get("enabled"):
+        return False
+    metrics.registry.enabled = True
+    if config.get("port"):
+        metrics.start_http_exporter(int(config["port"]), config.get("host", "127.0.0.1"))
+    if config.get("jsonl_path"):
+        metrics.start_jsonl_dump(config["jsonl_path"], float(config.get("interval", 60)))
+    return True
+
+SCREENS = {
+    'landing': display_landing_screen,
+    'critter_game': display_critter_game,
+    'reveal_glass': display_reveal_glass,
+    'gift_card': display_gift_card,
+    'message_screen': display_message_screen
+}
+
 def main():
     """Main application entry point."""
+    state = player_state()
     try:
+        get_session_registry().touch(state)
+        state.script_runs += 1
+        state.game_script_runs += 1
+        setup_metrics()
         apply_custom_css()
 
         # Display appropriate screen based on current state
-        screens = {
-            'landing': display_landing_screen,
-            'critter_game': display_critter_game,
-            'reveal_glass': display_reveal_glass,
-            'gift_card': display_gift_card,
-            'message_screen': display_message_screen
-        }
-
-        current_screen = st.session_state.current_screen
-        if current_screen in screens:
-            screens[current_screen]()
-        else:
-            st.session_state.current_screen = 'landing'
-            st.rerun()
+        if state.screen not in SCREENS:
+            state.screen = 'landing'
+        screen = state.screen
+        with metrics.registry.timer("script_run_seconds", screen=screen):
+            SCREENS[screen]()
 
     except Exception as e:
+        metrics.registry.inc("errors_total", screen=state.screen)
         st.error(f"Something went wrong. Returning to start... Error: {e}")
-        st.session_state.current_screen = 'landing' # Reset the screen
+        state.screen = 'landing' # Reset the screen
         st.rerun()
 
 if __name__ == '__main__':
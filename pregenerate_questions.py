@@ -0,0 +1,87 @@
+"""Build a question bundle for the critter game ahead of traffic.
+
+Walks every (animal, context) pair, asks the model for a few questions
+about each with bounded concurrency, keeps the ones that validate and
+writes a bundle that elizabeth-gift.py loads into its question bank at
+startup.
+
+    python pregenerate_questions.py --per-pair 3 --output question_bundle.json.gz
+    python pregenerate_questions.py --backend fake   # offline, no API key needed
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from backyard.bundle import write_bundle
+from backyard.fake_model import FakeModel
+from backyard.llm_client import LLMClient, ModelBackend
+from backyard.questions import ANIMALS, CONTEXTS, question_key, request_question_batch
+from backyard.static_deck import write_deck
+
+def make_model(args):
+    """Build the model backend named on the command line."""
+    if args.backend == "fake":
+        return FakeModel(latency=args.fake_latency, error_rate=args.fake_error_rate,
+                         malformed_rate=args.fake_malformed_rate, seed=args.seed)
+    api_key = args.api_key or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        sys.exit("No API key: pass --api-key or set GOOGLE_API_KEY.")
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(args.model)
+
+
+def generate_bundle(model, per_pair, concurrency=4, animals=ANIMALS, contexts=CONTEXTS, log=print):
+    """Generate `per_pair` validated questions for every pair; returns them deduplicated."""
+    pairs = list(itertools.product(animals, contexts))
+    questions = {}
+    failed = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(request_question_batch, model, [pair] * per_pair): pair for pair in pairs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            pair = futures[future]
+            try:
+                for question_data in future.result():
+                    questions.setdefault(question_key(question_data["question"]), question_data)
+            except Exception as e:
+                failed.append(pair)
+                log(f"[{done}/{len(pairs)}] {pair[0]} / {pair[1]}: failed ({e})")
+                continue
+            log(f"[{done}/{len(pairs)}] {pair[0]} / {pair[1]}: ok")
+    return list(questions.values()), failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="question_bundle.json.gz", help="bundle to write (.gz to compress)")
+    parser.add_argument("--deck", help="also compile a static deck for question_source = \"static\"")
+    parser.add_argument("--per-pair", type=int, default=3, help="questions per (animal, context) pair")
+    parser.add_argument("--concurrency", type=int, default=4, help="pairs generated at once")
+    parser.add_argument("--max-retries", type=int, default=5, help="retries on rate limits and 5xx errors")
+    parser.add_argument("--backend", choices=["gemini", "fake"], default="gemini")
+    parser.add_argument("--model", default="gemini-1.5-flash")
+    parser.add_argument("--api-key", help="Gemini API key (defaults to $GOOGLE_API_KEY)")
+    parser.add_argument("--seed", type=int, help="seed for the fake backend")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="seconds per fake call")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--fake-malformed-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    # The client backs off and retries rate limits and 5xx errors
+    model = LLMClient(ModelBackend(make_model(args)), max_concurrency=args.concurrency,
+                      max_retries=args.max_retries, base_delay=1.0, max_delay=30.0)
+    start = time.perf_counter()
+    questions, failed = generate_bundle(model, args.per_pair, args.concurrency)
+    count = write_bundle(args.output, questions)
+    if args.deck:
+        write_deck(args.deck, questions)
+    print(f"Wrote {count} questions to {args.output} in {time.perf_counter() - start:.1f}s"
+          f" ({len(failed)} pairs failed)")
+    return 1 if not count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
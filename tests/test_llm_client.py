@@ -0,0 +1,163 @@
+"""LLMClient against a stub backend: retries, deadlines, hedging and the shared concurrency cap."""
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from backyard.llm_client import LLMClient
+
+names = (f"stub-{n}" for n in itertools.count())
+
+
+class StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f"{code} stub failure")
+        self.code = code
+
+
+class Stub:
+    """Answers after `delay` seconds, failing with the codes in `errors` first, one per call."""
+
+    def __init__(self, delay=0.0, errors=(), delays=None):
+        # Each test gets its own name, since the concurrency cap is shared per name
+        self.name = next(names)
+        self.delay = delay
+        self.delays = list(delays or [])
+        self.errors = list(errors)
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.finished = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.pop(0) if self.delays else self.delay)
+            if self.errors:
+                raise StatusError(self.errors.pop(0))
+            self.finished += 1
+            return f"answer to {prompt}"
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+
+
+def client(backend, **kwargs):
+    kwargs.setdefault("base_delay", 0.01)
+    return LLMClient(backend, **kwargs)
+
+
+def test_retries_rate_limits_and_server_errors():
+    stub = Stub(errors=[429, 503])
+    llm = client(stub)
+    assert llm.generate_content("q").text == "answer to q"
+    assert stub.calls == 3
+    assert llm.stats["retries"] == 2 and llm.stats["failures"] == 0
+
+
+def test_gives_up_after_max_retries():
+    stub = Stub(errors=[429] * 10)
+    llm = client(stub, max_retries=2)
+    with pytest.raises(StatusError):
+        llm.generate_content("q")
+    assert stub.calls == 3
+    assert llm.failing()
+    # Rate limits don't call for a new client
+    assert llm.healthy()
+
+
+def test_does_not_retry_other_errors():
+    stub = Stub(errors=[400])
+    llm = client(stub, unhealthy_after=1)
+    with pytest.raises(StatusError):
+        llm.generate_content("q")
+    assert stub.calls == 1
+    assert not llm.healthy()
+
+
+def test_success_clears_failing():
+    stub = Stub(errors=[429])
+    llm = client(stub, max_retries=0)
+    with pytest.raises(StatusError):
+        llm.generate_content("q")
+    assert llm.failing() and not llm.failing(within=0)
+    llm.generate_content("q")
+    assert not llm.failing()
+
+
+def test_timed_out_attempts_are_retried():
+    stub = Stub(delays=[1.0], delay=0.0)
+    llm = client(stub, timeout=0.1)
+    assert llm.generate_content("q").text == "answer to q"
+    assert llm.stats["timeouts"] == 1
+    assert stub.cancelled == 1
+
+
+def test_deadline_bounds_retries():
+    stub = Stub(delay=0.05, errors=[503] * 100)
+    llm = client(stub, max_retries=100, base_delay=0.05, max_delay=0.05)
+    started = time.monotonic()
+    with pytest.raises(Exception):
+        llm.generate_content("q", deadline=0.3)
+    assert time.monotonic() - started < 0.6
+    assert stub.calls < 100
+
+
+@pytest.mark.parametrize("hedge_after", [None, 0.5])
+def test_timeout_cancels_the_backend_call(hedge_after):
+    stub = Stub(delay=0.4)
+    llm = client(stub, timeout=0.2, hedge_after=hedge_after, max_retries=0)
+    with pytest.raises(TimeoutError):
+        llm.generate_content("q")
+    time.sleep(0.4)
+    assert stub.finished == 0 and stub.cancelled == 1
+
+
+def test_hedge_answers_when_the_first_copy_is_slow():
+    stub = Stub(delays=[1.0, 0.01])
+    llm = client(stub, hedge_after=0.05)
+    started = time.monotonic()
+    assert llm.generate_content("q").text == "answer to q"
+    assert time.monotonic() - started < 0.5
+    assert llm.stats["hedges"] == 1
+    time.sleep(0.1)
+    # The slow copy was cancelled once the hedge won
+    assert stub.calls == 2 and stub.finished == 1 and stub.cancelled == 1
+
+
+def test_no_hedge_for_a_fast_call():
+    stub = Stub(delay=0.01)
+    llm = client(stub, hedge_after=0.5)
+    llm.generate_content("q")
+    assert stub.calls == 1 and llm.stats["hedges"] == 0
+
+
+def test_concurrency_cap_is_shared_by_clients_for_one_backend():
+    stub = Stub(delay=0.05)
+    first = client(stub, max_concurrency=2)
+    # e.g. the client rebuilt after the first went unhealthy
+    second = client(stub, max_concurrency=2)
+
+    async def run():
+        calls = [llm.agenerate(f"q{i}") for i, llm in zip(range(8), itertools.cycle([first, second]))]
+        return await asyncio.gather(*calls)
+
+    answers = asyncio.run_coroutine_threadsafe(run(), first._loop).result()
+    assert len(answers) == 8
+    assert stub.peak == 2
+
+
+def test_stream_gives_up_if_nothing_arrives_in_time():
+    stub = Stub(delay=1.0)
+    llm = client(stub)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        list(llm.stream("q", first_chunk_within=0.1))
+    assert time.monotonic() - started < 0.5
+    assert llm.failing()
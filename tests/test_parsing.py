@@ -0,0 +1,33 @@
+"""parse_question_text over the corpus of model responses we have seen go wrong."""
+import json
+import os
+
+import pytest
+
+from backyard.parsing import ResponseParseError, parse_question_text
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "malformed_responses.jsonl")
+
+# What every response in the corpus that can be saved should come out as
+QUESTION = {
+    "question": "What do I do with the acorns that I bury?",
+    "options": ["Leave them be", "Remember their location for later", "Forget where I buried them"],
+    "correct_answer": "Forget where I buried them",
+    "additional_fact": "That helps plant thousands of trees!",
+}
+
+with open(CORPUS, encoding="utf-8") as f:
+    ROWS = [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("row", ROWS, ids=[row["note"] for row in ROWS])
+def test_corpus(row):
+    if row["expect"] == "question":
+        assert parse_question_text(row["text"]) == QUESTION
+    else:
+        with pytest.raises(ResponseParseError):
+            parse_question_text(row["text"])
+
+
+def test_corpus_has_both_outcomes():
+    assert {row["expect"] for row in ROWS} == {"question", "error"}
@@ -0,0 +1,128 @@
+"""QuestionBank: TTL, LRU eviction per pair and overall, persistence, and batched last_used writes."""
+import sqlite3
+import time
+
+import pytest
+
+from backyard.fake_model import fake_question
+from backyard.question_bank import QuestionBank
+from backyard.questions import question_key
+
+PAIR = ("squirrel", "diet")
+OTHER = ("robin", "habitat")
+
+
+def question(n, pair=PAIR):
+    return fake_question(*pair, n)
+
+
+def key(n, pair=PAIR):
+    return question_key(question(n, pair)["question"])
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "bank.sqlite3")
+
+
+def stored(path):
+    db = sqlite3.connect(path)
+    try:
+        return dict(db.execute("SELECT key, last_used FROM questions"))
+    finally:
+        db.close()
+
+
+def test_take_skips_seen_questions_and_marks_the_one_served():
+    bank = QuestionBank()
+    bank.add(*PAIR, question(1))
+    bank.add(*PAIR, question(2))
+    seen = {key(1)}
+    assert bank.take(*PAIR, seen)["question"] == question(2)["question"]
+    assert seen == {key(1), key(2)}
+    assert bank.take(*PAIR, seen) is None
+    assert bank.take(*OTHER) is None
+    assert bank.stats()["hits"] == 1 and bank.stats()["misses"] == 2
+
+
+def test_add_marks_the_question_seen_for_its_session():
+    bank = QuestionBank()
+    seen = set()
+    bank.add(*PAIR, question(1), seen)
+    assert seen == {key(1)}
+    assert bank.take(*PAIR, seen) is None
+
+
+def test_expired_questions_are_not_served_or_reloaded(path):
+    bank = QuestionBank(path, ttl_seconds=0.05)
+    bank.add(*PAIR, question(1))
+    time.sleep(0.1)
+    assert bank.take(*PAIR) is None
+    bank.close()
+    assert len(QuestionBank(path, ttl_seconds=0.05)) == 0
+    assert stored(path) == {}
+
+
+def test_per_pair_limit_evicts_the_least_recently_served():
+    bank = QuestionBank(max_per_pair=2)
+    bank.add(*PAIR, question(1))
+    bank.add(*PAIR, question(2))
+    # Serving 1 makes 2 the least recently used
+    bank.take(*PAIR, {key(2)})
+    bank.add(*PAIR, question(3))
+    seen = set()
+    while bank.take(*PAIR, seen) is not None:
+        pass
+    assert seen == {key(1), key(3)}
+
+
+def test_total_limit_evicts_across_pairs(path):
+    bank = QuestionBank(path, max_questions=3)
+    for n in range(3):
+        bank.add(*PAIR, question(n))
+    bank.add(*OTHER, question(0, OTHER))
+    assert len(bank) == 3
+    assert key(0) not in stored(path)
+    assert bank.stats()["pairs"] == 2
+
+
+def test_questions_survive_reopening(path):
+    bank = QuestionBank(path)
+    for n in range(3):
+        bank.add(*PAIR, question(n))
+    bank.close()
+    reopened = QuestionBank(path)
+    assert len(reopened) == 3
+    assert reopened.take(*PAIR, {key(0), key(1)})["question"] == question(2)["question"]
+
+
+def test_last_used_is_written_in_batches(path):
+    bank = QuestionBank(path, touch_batch=2)
+    for n in range(3):
+        bank.add(*PAIR, question(n))
+    added = stored(path)
+    time.sleep(0.01)
+
+    bank.take(*PAIR, {key(1), key(2)})
+    assert stored(path) == added, "a single hit shouldn't write"
+    bank.take(*PAIR, {key(0), key(2)})
+    written = stored(path)
+    assert written[key(0)] > added[key(0)] and written[key(1)] > added[key(1)]
+
+    bank.take(*PAIR, {key(0), key(1)})
+    assert stored(path)[key(2)] == added[key(2)]
+    bank.close()
+    assert stored(path)[key(2)] > added[key(2)], "close flushes what is left"
+
+
+def test_reopened_bank_keeps_serving_order(path):
+    bank = QuestionBank(path, max_questions=2)
+    bank.add(*PAIR, question(0))
+    bank.add(*PAIR, question(1))
+    time.sleep(0.01)
+    bank.take(*PAIR, {key(1)})
+    bank.close()
+    # 1 was served least recently, so it is the one a new question pushes out
+    reopened = QuestionBank(path, max_questions=2)
+    reopened.add(*PAIR, question(2))
+    assert set(stored(path)) == {key(0), key(2)}
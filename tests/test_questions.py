@@ -0,0 +1,79 @@
+"""PairSampler dealing without replacement, and request_questions dropping repeats."""
+import json
+import threading
+from itertools import product
+
+from backyard.fake_model import FakeResponse, fake_question
+from backyard.questions import ANIMALS, CONTEXTS, PairSampler, question_key, request_questions
+
+ALL_PAIRS = set(product(ANIMALS, CONTEXTS))
+
+
+def test_a_round_never_repeats_an_animal():
+    for _ in range(200):
+        sampler = PairSampler()
+        pairs = sampler.draw(5)
+        assert len({animal for animal, _ in pairs}) == 5
+
+
+def test_one_at_a_time_draws_match_a_batch():
+    sampler = PairSampler()
+    animals = [sampler.draw(1)[0][0] for _ in range(len(ANIMALS))]
+    assert sorted(animals) == sorted(ANIMALS)
+
+
+def test_every_pair_is_dealt_once_before_any_repeats():
+    sampler = PairSampler()
+    pairs = sampler.draw(len(ALL_PAIRS))
+    assert set(pairs) == ALL_PAIRS
+    # Each stretch of len(ANIMALS) draws still covers every animal
+    for start in range(0, len(pairs), len(ANIMALS)):
+        assert {animal for animal, _ in pairs[start:start + len(ANIMALS)]} == set(ANIMALS)
+    # Then the deck is reshuffled rather than running dry
+    assert set(sampler.draw(len(ALL_PAIRS))) == ALL_PAIRS
+
+
+def test_reset_makes_every_pair_available_again():
+    sampler = PairSampler()
+    sampler.draw(len(ALL_PAIRS) - 1)
+    sampler.reset()
+    assert set(sampler.draw(len(ALL_PAIRS))) == ALL_PAIRS
+
+
+def test_concurrent_draws_share_out_distinct_pairs():
+    sampler = PairSampler()
+    drawn = []
+
+    def draw():
+        drawn.extend(sampler.draw(6))
+
+    threads = [threading.Thread(target=draw) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(drawn) == sorted(ALL_PAIRS)
+
+
+class RepeatingModel:
+    """Always answers with the same question, whatever it is asked about."""
+
+    def __init__(self, question_data):
+        self.text = json.dumps({k: question_data[k] for k in ("question", "options", "correct_answer", "additional_fact")})
+
+    def generate_content(self, prompt):
+        return FakeResponse(self.text)
+
+
+def test_repeats_of_seen_questions_are_dropped():
+    question_data = fake_question("robin", "diet", 1)
+    seen = {question_key(question_data["question"])}
+    assert request_questions(RepeatingModel(question_data), 1, seen=seen, sampler=PairSampler()) == []
+
+
+def test_new_questions_are_returned_and_marked_seen():
+    question_data = fake_question("robin", "diet", 1)
+    seen = set()
+    questions = request_questions(RepeatingModel(question_data), 1, seen=seen, sampler=PairSampler())
+    assert [q["question"] for q in questions] == [question_data["question"]]
+    assert question_key(question_data["question"]) in seen
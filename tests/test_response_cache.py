@@ -0,0 +1,96 @@
+"""ResponseCache: coalescing identical calls, TTL expiry, and never caching errors."""
+import asyncio
+
+from backyard.response_cache import ResponseCache, cache_key
+
+
+class Backend:
+    """Counts calls; each takes `delay` seconds and answers with its call number."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"answer {self.calls}"
+
+
+def test_concurrent_identical_calls_share_one_backend_call():
+    cache = ResponseCache()
+    backend = Backend()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_call("k", backend) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["answer 1"] * 10
+    assert backend.calls == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_cached_answer_is_served_until_it_expires():
+    cache = ResponseCache(ttl_seconds=0.1)
+    backend = Backend(delay=0)
+
+    async def run():
+        first = await cache.get_or_call("k", backend)
+        again = await cache.get_or_call("k", backend)
+        await asyncio.sleep(0.15)
+        expired = await cache.get_or_call("k", backend)
+        return first, again, expired
+
+    assert asyncio.run(run()) == ("answer 1", "answer 1", "answer 2")
+    assert cache.stats()["hits"] == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ResponseCache()
+    backend = Backend(error=RuntimeError("429"))
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_call("k", backend) for _ in range(3)), return_exceptions=True)
+        backend.error = None
+        return results, await cache.get_or_call("k", backend)
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert backend.calls == 2
+    assert retry == "answer 2"
+
+
+def test_one_waiter_cancelled_does_not_cancel_the_shared_call():
+    cache = ResponseCache()
+    backend = Backend()
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_call("k", backend))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get_or_call("k", backend))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader, follower
+
+    text, follower = asyncio.run(run())
+    assert text == "answer 1"
+    assert follower.cancelled()
+
+
+def test_lru_bound_and_invalidate():
+    cache = ResponseCache(max_entries=2)
+
+    async def run():
+        for key in "abc":
+            await cache.get_or_call(key, Backend(delay=0))
+        cache.invalidate("c")
+
+    asyncio.run(run())
+    assert cache.stats()["entries"] == 1
+
+
+def test_key_depends_on_model_and_prompt():
+    assert len({cache_key("a", "x"), cache_key("b", "x"), cache_key("a", "y")}) == 3
+    assert cache_key("a", "x") == cache_key("a", "x")
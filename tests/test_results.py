@@ -0,0 +1,137 @@
+"""ResultsStore: batched flushes, draining on close, the leaderboard, and write errors."""
+import sqlite3
+import time
+
+import pytest
+
+from backyard.results import SCHEMA, ResultsStore, game_result
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "results.sqlite3")
+
+
+def game(score, seconds, finished_at):
+    return game_result(score, 5, "1" * score + "0" * (5 - score), [seconds], finished_at=finished_at)
+
+
+def stored(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT score, seconds, finished_at FROM games ORDER BY id").fetchall()
+    finally:
+        db.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_a_full_batch_is_written_without_waiting_for_the_interval(path):
+    store = ResultsStore(path, batch_size=3, flush_interval=60)
+    store.record(game(5, 10, 1))
+    store.record(game(4, 10, 2))
+    time.sleep(0.05)
+    assert store.stats() == {"pending": 2, "written": 0}
+    store.record(game(3, 10, 3))
+    assert wait_for(lambda: store.stats()["written"] == 3)
+    assert [row[2] for row in stored(path)] == [1, 2, 3]
+    store.close()
+
+
+def test_games_are_written_every_flush_interval(path):
+    store = ResultsStore(path, batch_size=100, flush_interval=0.05)
+    store.record(game(5, 10, 1))
+    assert wait_for(lambda: store.stats() == {"pending": 0, "written": 1})
+    store.close()
+
+
+def test_close_drains_the_queue(path):
+    store = ResultsStore(path, batch_size=100, flush_interval=60)
+    for n in range(5):
+        store.record(game(n, 10, n))
+    assert store.stats()["written"] == 0
+    store.close()
+    assert store.stats() == {"pending": 0, "written": 5}
+    assert len(stored(path)) == 5
+    with pytest.raises(RuntimeError):
+        store.record(game(5, 10, 6))
+
+
+def test_leaderboard_merges_pending_and_written_games_once(path):
+    store = ResultsStore(path, batch_size=2, flush_interval=60)
+    store.record(game(3, 10, 1))
+    store.record(game(5, 10, 2))
+    assert wait_for(lambda: store.stats()["written"] == 2)
+    store.record(game(4, 10, 3))
+    assert store.stats()["pending"] == 1
+
+    board = store.leaderboard()
+    assert [g["finished_at"] for g in board] == [2, 3, 1]
+    assert [g["finished_at"] for g in store.leaderboard(2)] == [2, 3]
+    store.close()
+
+
+def test_leaderboard_skips_a_pending_game_already_written(path):
+    store = ResultsStore(path, batch_size=100, flush_interval=60)
+    store.record(game(5, 10, 1))
+    # As if the writer had committed the batch but not yet dropped it from pending
+    db = sqlite3.connect(path)
+    with db:
+        db.execute("INSERT INTO games (finished_at, score, total, answers, seconds, answer_seconds) "
+                   "VALUES (1, 5, 5, '11111', 10, '[10]')")
+    db.close()
+    assert [g["finished_at"] for g in store.leaderboard()] == [1]
+    store.close()
+
+
+def test_leaderboard_ranks_by_score_then_seconds_then_finish_time(path):
+    store = ResultsStore(path, batch_size=100, flush_interval=60)
+    store.record(game(4, 12.5, 1))
+    store.record(game(5, 30.0, 2))
+    store.record(game(4, 9.0, 3))
+    store.record(game(4, 9.0, 4))
+    store.record(game(2, 1.0, 5))
+    expected = [2, 3, 4, 1, 5]
+    assert [g["finished_at"] for g in store.leaderboard()] == expected
+    store.close()
+    reopened = ResultsStore(path)
+    assert [g["finished_at"] for g in reopened.leaderboard()] == expected
+    reopened.close()
+
+
+def drop_games_table(path):
+    db = sqlite3.connect(path)
+    db.execute("DROP TABLE games")
+    db.close()
+
+
+def test_a_failed_flush_keeps_the_games_for_the_next_one(path):
+    store = ResultsStore(path, batch_size=100, flush_interval=0.05)
+    drop_games_table(path)
+    store.record(game(5, 10, 1))
+    time.sleep(0.2)
+    assert store.stats() == {"pending": 1, "written": 0}
+
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.close()
+    assert wait_for(lambda: store.stats() == {"pending": 0, "written": 1})
+    assert stored(path) == [(5, 10.0, 1.0)]
+    store.close()
+
+
+def test_close_reports_games_it_could_not_write(path):
+    store = ResultsStore(path, batch_size=100, flush_interval=0.01)
+    drop_games_table(path)
+    store.record(game(5, 10, 1))
+    store.record(game(4, 10, 2))
+    with pytest.raises(RuntimeError, match="2 games could not be written"):
+        store.close()
+    assert store.stats() == {"pending": 2, "written": 0}
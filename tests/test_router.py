@@ -0,0 +1,116 @@
+"""CircuitBreaker transitions and ModelRouter failover, in process and over stand-in servers."""
+import asyncio
+import time
+
+from backyard.fake_model import FakeModel
+from backyard.providers import OllamaBackend, OpenAIBackend, ProviderError
+from backyard.router import CircuitBreaker, ModelRouter, Route
+from backyard.standin_servers import start_standin_server
+
+
+class Backend:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        if self.fail:
+            raise ProviderError(503, "down")
+        return f"{self.name}: {prompt}"
+
+
+def test_breaker_closed_open_half_open_closed():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=10)
+    assert breaker.state == "closed" and breaker.available(0)
+    breaker.trip(100)
+    assert breaker.state == "open" and breaker.trips == 1
+    assert not breaker.available(105)
+    assert breaker.available(110) and breaker.state == "half_open"
+    breaker.trial_running = True
+    assert not breaker.available(111)
+    # Tripping an open breaker restarts its cool-down but isn't a new trip
+    breaker.trip(112)
+    breaker.trip(113)
+    assert breaker.trips == 2
+
+
+def test_router_trips_after_threshold_and_recovers_through_one_trial():
+    flaky = Backend("flaky", fail=True)
+    route = Route(flaky, breaker=CircuitBreaker(failure_threshold=3, cooldown=0.05))
+    router = ModelRouter([route, Route(Backend("steady"))], explore=0)
+
+    async def run():
+        for _ in range(3):
+            # Fresh routes score 0; keep steady's estimate high so flaky goes first
+            router.routes[1].latency = 10.0
+            assert (await router.generate("q")).startswith("steady")
+        assert route.breaker.state == "open" and flaky.calls == 3
+        await router.generate("q")
+        assert flaky.calls == 3
+        await asyncio.sleep(0.06)
+        flaky.fail = False
+        route.error_rate = 0.0
+        route.latency = 0.0
+        assert await router.generate("q") == "flaky: q"
+
+    asyncio.run(run())
+    assert route.breaker.state == "closed"
+    assert route.breaker.trips == 1
+
+
+def test_failed_trial_reopens_the_breaker():
+    route = Route(Backend("down", fail=True), breaker=CircuitBreaker(failure_threshold=1, cooldown=0))
+    router = ModelRouter([route, Route(Backend("up"))], explore=0)
+    route.breaker.trip(0)
+    assert route.breaker.available(1)
+    started, trial = router._start(route)
+    router._record(route, started, trial, ProviderError(503, "down"))
+    assert route.breaker.state == "open"
+    assert not route.breaker.trial_running
+
+
+def test_stale_call_does_not_decide_a_half_open_breaker():
+    route = Route(Backend("a"), breaker=CircuitBreaker(failure_threshold=1, cooldown=0))
+    router = ModelRouter([route], explore=0)
+    stale = router._start(route)
+    router._record(route, *router._start(route), RuntimeError("boom"))
+    assert route.breaker.state == "open"
+    assert route.breaker.available(time.monotonic()) and route.breaker.state == "half_open"
+    trial = router._start(route)
+    assert trial[1] and route.breaker.trial_running
+
+    # The call that began before the breaker opened finishes first
+    router._record(route, *stale)
+    assert route.breaker.state == "half_open"
+    assert not route.breaker.available(time.monotonic())
+
+    router._record(route, *trial)
+    assert route.breaker.state == "closed"
+
+
+def test_failover_across_standin_servers():
+    server = start_standin_server(FakeModel(seed=1))
+    dead = start_standin_server(FakeModel())
+    dead.shutdown()
+    dead.server_close()
+    router = ModelRouter(
+        [Route(OpenAIBackend(dead.url + "/v1", "m", timeout=2)), Route(OllamaBackend(server.url, "m", timeout=5))],
+        explore=0,
+    )
+
+    async def run():
+        text = await router.generate("Tell me about a squirrel's diet")
+        chunks = [chunk async for chunk in router.stream("Tell me about a robin's nest")]
+        return text, chunks
+
+    try:
+        text, chunks = asyncio.run(run())
+    finally:
+        server.shutdown()
+    assert '"question"' in text
+    assert '"question"' in "".join(chunks)
+    stats = router.stats()
+    assert stats["openai:m"]["calls"] >= 1 and stats["openai:m"]["error_rate"] > 0
+    assert stats["ollama:m"]["calls"] == 2